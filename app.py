@@ -2,9 +2,8 @@ import streamlit as st
 import session
 import styles
 
-# set up config and redis connection
 st.set_page_config(page_title="Geo Games", page_icon="🌍", layout="wide")
-session.setup_multiplayer_session()
+session.setup_session()
 
 # Apply custom geography theme
 styles.apply_birthday_theme()
@@ -79,3 +78,4 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 styles.add_geography_footer()
+session.sync_presence()
@@ -0,0 +1,401 @@
+"""Image assets: resized WebP derivatives of the flags and silhouettes.
+
+Build them with `python assets.py`. The build is incremental: sources are keyed by content
+hash, so only new or changed images are re-encoded. Output goes to static/assets/ under
+content-hashed names (which also keeps the answer out of the URL), so with static serving
+enabled image_url() points browsers at files they can cache forever. Without a build,
+resolve_image() falls back to the original PNG and the bytes go through st.image.
+"""
+import functools
+import hashlib
+import io
+import json
+import logging
+import pathlib
+import shutil
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+ASSETS_DIR = pathlib.Path(__file__).resolve().parents[0] / "assets"
+# Streamlit serves <main script dir>/static/ at app/static/ when server.enableStaticServing is on
+STATIC_DIR = pathlib.Path(__file__).resolve().parents[0] / "static"
+STATIC_URL = "app/static"
+BUILD_DIR = STATIC_DIR / "assets"
+BUILD_URL = f"{STATIC_URL}/assets"
+# kept out of the static dir: it maps source names to hashes, i.e. URLs back to answers
+MANIFEST_PATH = ASSETS_DIR / "manifest.json"
+SOURCE_DIRS = ("flags", "silhouettes")
+VARIANT_WIDTHS = (320, 640, 1280)  # px; never upscaled beyond the source width
+DISPLAY_WIDTH = 640  # px of the single image served without srcset (st.image fallback, build report)
+WEBP_QUALITY = 80
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024  # in-memory budget for served image bytes, per process
+DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "data" / "countries.json"
+IMAGE_FIELDS = {"flag_image": "flags", "silhouette": "silhouettes"}  # countries.json field -> source dir
+ATLAS_SOURCES = {"flags": "flag_image"}  # source dir -> countries.json field packed into atlases
+ATLAS_TILE_WIDTH = DISPLAY_WIDTH  # px per tile; a narrower tile is stretched, and blurred, at display size
+ATLAS_COLUMNS = 4  # keeps sheets 2560 px wide
+ATLAS_MAX_HEIGHT = 4096  # px per sheet before starting a new one
+
+logger = logging.getLogger(__name__)
+
+class AssetInfo(NamedTuple):
+    path: pathlib.Path
+    bytes: int
+    width: int
+    height: int
+
+class AssetIndex(NamedTuple):
+    """Every image countries.json refers to, checked once per process instead of on every render."""
+    # (image field, filename) -> verified source file
+    assets: Mapping[Tuple[str, str], AssetInfo]
+    # image field -> ids of the countries whose image for that field is usable
+    playable: Mapping[str, FrozenSet[int]]
+    problems: Tuple[str, ...]
+
+def build_asset_index(countries: List[Dict[str, Any]]) -> AssetIndex:
+    """Open the header of every referenced image; entries without a readable one are left unplayable."""
+    from PIL import Image
+
+    assets, playable, problems = {}, {}, []
+    for field, source_dir in IMAGE_FIELDS.items():
+        ids = []
+        for country_id, country in enumerate(countries):
+            filename = country[field]
+            if not filename:
+                problems.append(f"{country['name']}: no {field}")
+                continue
+            if (field, filename) not in assets:
+                path = ASSETS_DIR / source_dir / filename
+                try:
+                    with Image.open(path) as image:
+                        assets[(field, filename)] = AssetInfo(path, path.stat().st_size, image.width, image.height)
+                except OSError as e:  # missing, unreadable or not an image
+                    problems.append(f"{country['name']}: {field} {filename} unusable ({e.__class__.__name__})")
+                    continue
+            ids.append(country_id)
+        playable[field] = frozenset(ids)
+    return AssetIndex(MappingProxyType(assets), MappingProxyType(playable), tuple(problems))
+
+@functools.lru_cache(maxsize=1)
+def get_asset_index() -> AssetIndex:
+    """The process-wide asset index; problems are logged once, when it is first built."""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        index = build_asset_index(json.load(f))
+    for problem in index.problems:
+        logger.warning("asset check: %s", problem)
+    return index
+
+def playable_ids(image_field: str, country_ids: List[int]) -> List[int]:
+    """The ids whose image for `image_field` passed the startup check, in their original order."""
+    playable = get_asset_index().playable[image_field]
+    return [i for i in country_ids if i in playable]
+
+@functools.lru_cache(maxsize=1)
+def load_manifest() -> Dict[str, Any]:
+    if not MANIFEST_PATH.exists():
+        return {"sources": {}, "variants": {}, "originals": {}, "atlases": {}, "atlas_tiles": {}}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _built_image(image_dir: pathlib.Path, filename: str, width: int) -> Optional[Dict[str, Any]]:
+    """Manifest entry of the smallest built variant at least `width` px wide, else of the source's copy.
+
+    Variants are only built when they are smaller than the source and never wider than it,
+    so the source is the right fallback whenever no variant covers `width`.
+    """
+    manifest = load_manifest()
+    content_hash = manifest["sources"].get(f"{image_dir.name}/{filename}")
+    if content_hash is None:
+        return None
+    # variants are stored smallest first
+    chosen = next((v for v in manifest["variants"].get(content_hash, ()) if v["width"] >= width), None)
+    return chosen or manifest["originals"].get(content_hash)
+
+def resolve_image(image_dir: pathlib.Path, filename: str, width: int = DISPLAY_WIDTH) -> pathlib.Path:
+    """Path of the file to serve for `filename` at `width` px, the source image if nothing is built."""
+    built = _built_image(image_dir, filename, width)
+    if built is None:
+        return image_dir / filename
+    return BUILD_DIR / built["file"]
+
+def image_url(image_dir: pathlib.Path, filename: str, width: int = DISPLAY_WIDTH) -> Optional[str]:
+    """Static URL of the file resolve_image() picks, or None when it has to go through st.image.
+
+    The ?v= query makes Streamlit's static handler send a ten-year max-age, which is safe
+    because built files are named by content hash and never change.
+    """
+    import streamlit as st
+
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    built = _built_image(image_dir, filename, width)
+    if built is None:
+        return None
+    return _static_url(built["file"])
+
+def image_srcset(image_dir: pathlib.Path, filename: str) -> Optional[str]:
+    """srcset listing every built width of `filename`, so browsers fetch the one their screen needs.
+
+    None whenever image_url() is; the source copy is only listed when it is wider than every variant.
+    """
+    import streamlit as st
+
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    manifest = load_manifest()
+    content_hash = manifest["sources"].get(f"{image_dir.name}/{filename}")
+    if content_hash is None:
+        return None
+    candidates = list(manifest["variants"].get(content_hash, ()))
+    original = manifest["originals"].get(content_hash)
+    if original is not None and all(original["width"] > variant["width"] for variant in candidates):
+        candidates.append(original)
+    return ", ".join(f"{_static_url(entry['file'])} {entry['width']}w" for entry in candidates) or None
+
+def _static_url(file: str) -> str:
+    content_hash = file.rsplit("/", 1)[-1].split(".")[0]
+    return f"{BUILD_URL}/{file}?v={content_hash}"
+
+def atlas_tile(image_dir: pathlib.Path, filename: str) -> Optional[Dict[str, Any]]:
+    """Where `filename` sits in a built sprite atlas, or None without atlases or static serving.
+
+    Returns the sheet's static URL and size plus the tile's x, y, width and height in px.
+    """
+    import streamlit as st
+
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    manifest = load_manifest()
+    tile = manifest.get("atlas_tiles", {}).get(f"{image_dir.name}/{filename}")
+    if tile is None:
+        return None
+    atlas_key, sheet_index, x, y, width, height = tile
+    sheet = manifest["atlases"][atlas_key]["sheets"][sheet_index]
+    return {
+        "url": _static_url(sheet["file"]),
+        "sheet_width": sheet["width"],
+        "sheet_height": sheet["height"],
+        "x": x,
+        "y": y,
+        "width": width,
+        "height": height,
+    }
+
+class ImageCache:
+    """Thread-safe LRU of image bytes bounded by their total size, shared by every session."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: pathlib.Path) -> Optional[bytes]:
+        """Bytes of the file at `path`, read from disk on a miss; None if it does not exist."""
+        key = str(path)
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if key not in self._items and len(data) <= self.max_bytes:
+                self._items[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, evicted = self._items.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "items": len(self._items), "bytes": self.size, "max_bytes": self.max_bytes}
+
+image_cache = ImageCache(IMAGE_CACHE_BYTES)
+
+def read_image(image_dir: pathlib.Path, filename: str, width: int = DISPLAY_WIDTH) -> Optional[bytes]:
+    """Bytes of the variant resolve_image() picks, served from the process-wide cache."""
+    return image_cache.get(resolve_image(image_dir, filename, width))
+
+def _pack_atlas(source_dir: str, filenames: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, List[int]]]:
+    """Shelf-pack the images into WebP sheets; returns the sheets and filename -> [sheet, x, y, w, h]."""
+    from PIL import Image
+
+    tiles = []
+    for filename in filenames:
+        with Image.open(ASSETS_DIR / source_dir / filename) as source:
+            image = source.convert("RGBA")
+        height = round(image.height * ATLAS_TILE_WIDTH / image.width)
+        tiles.append((filename, image.resize((ATLAS_TILE_WIDTH, height), Image.LANCZOS)))
+    # similar heights share a row, which wastes less space
+    tiles.sort(key=lambda tile: tile[1].height)
+
+    rows = [tiles[i:i + ATLAS_COLUMNS] for i in range(0, len(tiles), ATLAS_COLUMNS)]
+    sheets, positions, sheet_rows = [], {}, []
+    def flush():
+        if not sheet_rows:
+            return
+        sheet_height = sum(max(image.height for _, image in row) for row in sheet_rows)
+        sheet_width = ATLAS_TILE_WIDTH * max(len(row) for row in sheet_rows)
+        sheet = Image.new("RGBA", (sheet_width, sheet_height))
+        y = 0
+        for row in sheet_rows:
+            for column, (filename, image) in enumerate(row):
+                sheet.paste(image, (column * ATLAS_TILE_WIDTH, y))
+                positions[filename] = [len(sheets), column * ATLAS_TILE_WIDTH, y, image.width, image.height]
+            y += max(image.height for _, image in row)
+        buffer = io.BytesIO()
+        sheet.save(buffer, "WEBP", quality=WEBP_QUALITY)
+        data = buffer.getvalue()
+        file = f"atlas/{hashlib.sha256(data).hexdigest()[:16]}.webp"
+        (BUILD_DIR / file).write_bytes(data)
+        sheets.append({"file": file, "width": sheet_width, "height": sheet_height, "bytes": len(data)})
+        sheet_rows.clear()
+
+    height = 0
+    for row in rows:
+        row_height = max(image.height for _, image in row)
+        if sheet_rows and height + row_height > ATLAS_MAX_HEIGHT:
+            flush()
+            height = 0
+        sheet_rows.append(row)
+        height += row_height
+    flush()
+    return sheets, positions
+
+def build_atlases(manifest: Dict[str, Any]) -> None:
+    """Pack each pool type's images into sprite atlases, one set per (source dir, country type).
+
+    An atlas is only re-packed when the content hashes of its images change.
+    """
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        countries = json.load(f)
+    (BUILD_DIR / "atlas").mkdir(parents=True, exist_ok=True)
+    atlases = {}
+    for source_dir, field in ATLAS_SOURCES.items():
+        for country_type in sorted({c["type"] for c in countries}):
+            filenames = sorted({
+                c[field] for c in countries
+                if c["type"] == country_type and f"{source_dir}/{c[field]}" in manifest["sources"]
+            })
+            if not filenames:
+                continue
+            atlas_key = f"{source_dir}/{country_type}"
+            inputs = hashlib.sha256(json.dumps(
+                [ATLAS_TILE_WIDTH, ATLAS_COLUMNS, ATLAS_MAX_HEIGHT] + [manifest["sources"][f"{source_dir}/{name}"] for name in filenames]
+            ).encode()).hexdigest()[:16]
+            previous = manifest["atlases"].get(atlas_key)
+            if previous and previous["inputs"] == inputs and all((BUILD_DIR / sheet["file"]).exists() for sheet in previous["sheets"]):
+                atlases[atlas_key] = previous
+                continue
+            sheets, positions = _pack_atlas(source_dir, filenames)
+            atlases[atlas_key] = {"inputs": inputs, "sheets": sheets, "tiles": positions}
+    _set_atlases(manifest, atlases)
+
+def _set_atlases(manifest: Dict[str, Any], atlases: Dict[str, Any]) -> None:
+    """Replace the manifest's atlases, deleting sheets that are no longer used."""
+    live_files = {sheet["file"] for atlas in atlases.values() for sheet in atlas["sheets"]}
+    for atlas in manifest["atlases"].values():
+        for sheet in atlas["sheets"]:
+            if sheet["file"] not in live_files:
+                (BUILD_DIR / sheet["file"]).unlink(missing_ok=True)
+    manifest["atlases"] = atlases
+    manifest["atlas_tiles"] = {
+        f"{atlas_key.split('/')[0]}/{filename}": [atlas_key, *position]
+        for atlas_key, atlas in atlases.items()
+        for filename, position in atlas["tiles"].items()
+    }
+
+def build(force: bool = False, atlas: bool = False) -> Dict[str, Any]:
+    """Encode every source image into WebP variants, optionally pack sprite atlases, and write the manifest."""
+    from PIL import Image
+
+    manifest = {"sources": {}, "variants": {}, "originals": {}, "atlases": {}, "atlas_tiles": {}} if force else json.loads(json.dumps(load_manifest()))
+    manifest.setdefault("originals", {})
+    manifest.setdefault("atlases", {})
+    live_hashes = set()
+    for source_dir in SOURCE_DIRS:
+        (BUILD_DIR / source_dir).mkdir(parents=True, exist_ok=True)
+        for path in sorted((ASSETS_DIR / source_dir).glob("*.png")):
+            content_hash = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+            manifest["sources"][f"{source_dir}/{path.name}"] = content_hash
+            live_hashes.add(content_hash)
+            variants = manifest["variants"].get(content_hash)
+            original = manifest["originals"].get(content_hash)
+            if variants is not None and original is not None and all((BUILD_DIR / v["file"]).exists() for v in variants + [original]):
+                continue
+
+            source_bytes = path.stat().st_size
+            with Image.open(path) as source:
+                image = source.convert("RGBA" if source.mode in ("P", "LA", "RGBA") else "RGB")
+            # the source is served as is whenever no smaller variant covers the requested width
+            original = {"file": f"{source_dir}/{content_hash}.png", "width": image.width, "height": image.height, "bytes": source_bytes}
+            shutil.copyfile(path, BUILD_DIR / original["file"])
+            manifest["originals"][content_hash] = original
+            variants = []
+            for width in sorted({min(w, image.width) for w in VARIANT_WIDTHS}):
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.LANCZOS)
+                # flat-colour images (most silhouettes) are smaller lossless; keep whichever encoding wins
+                encodings = []
+                for options in ({"quality": WEBP_QUALITY}, {"lossless": True}):
+                    buffer = io.BytesIO()
+                    resized.save(buffer, "WEBP", **options)
+                    encodings.append(buffer.getvalue())
+                data = min(encodings, key=len)
+                if len(data) >= source_bytes:
+                    # already-optimized PNGs (e.g. palette silhouettes) are served as they are
+                    continue
+                file = f"{source_dir}/{content_hash}.{width}.webp"
+                (BUILD_DIR / file).write_bytes(data)
+                variants.append({"file": file, "width": width, "height": height, "bytes": len(data)})
+            manifest["variants"][content_hash] = variants
+
+    # drop derivatives of images that no longer exist
+    for content_hash in set(manifest["variants"]) - live_hashes:
+        for variant in manifest["variants"].pop(content_hash):
+            (BUILD_DIR / variant["file"]).unlink(missing_ok=True)
+    for content_hash in set(manifest["originals"]) - live_hashes:
+        (BUILD_DIR / manifest["originals"].pop(content_hash)["file"]).unlink(missing_ok=True)
+
+    if atlas:
+        build_atlases(manifest)
+    else:
+        _set_atlases(manifest, {})
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    load_manifest.cache_clear()
+    return manifest
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build resized WebP derivatives of the image assets.")
+    parser.add_argument("--force", action="store_true", help="re-encode every image, ignoring the existing manifest")
+    parser.add_argument("--atlas", action="store_true", help=f"also pack flags into one set of sprite atlases per country type (dropped when omitted); "
+                        f"tiles are {ATLAS_TILE_WIDTH} px wide, so a type's sheets come to roughly 0.5-1 MB, downloaded up front")
+    args = parser.parse_args()
+    result = build(force=args.force, atlas=args.atlas)
+    source_bytes = sum(p.stat().st_size for d in SOURCE_DIRS for p in (ASSETS_DIR / d).glob("*.png"))
+    display_bytes = sum(
+        resolve_image(ASSETS_DIR / source.split("/")[0], source.split("/")[1]).stat().st_size
+        for source in result["sources"]
+    )
+    for problem in build_asset_index(json.loads(DATA_PATH.read_text(encoding="utf-8"))).problems:
+        print(f"warning: {problem}")
+    print(f"{len(result['sources'])} images: "
+          f"{source_bytes / 1e6:.1f} MB of sources -> {display_bytes / 1e6:.1f} MB served at {DISPLAY_WIDTH}px")
+    for atlas_key, packed in result["atlases"].items():
+        print(f"atlas {atlas_key}: {len(packed['tiles'])} tiles in {len(packed['sheets'])} sheets, "
+              f"{sum(sheet['bytes'] for sheet in packed['sheets']) / 1e6:.2f} MB")
@@ -0,0 +1,185 @@
+"""Multiplayer load test: N lobbies of M bot players play full games through the multiplayer_game API.
+
+    python bench/load_test.py                      # in-process store (ENV=memory)
+    python bench/load_test.py --backend redis      # the ENV section of .streamlit/secrets.toml (default redis-local)
+    python bench/load_test.py --save-baseline      # record this run as the backend's baseline
+
+Every player is a thread. Per round the host publishes, each player loads the game view and
+submits, then the host scores, so rounds stay in step like a real game. Reports throughput,
+p50/p99 latency per API call and the Redis commands it cost, and compares them with the
+baseline stored for the backend in bench/load_baseline.json (exit status 1 on a regression).
+"""
+import argparse
+import json
+import logging
+import os
+import pathlib
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+BASELINE_PATH = ROOT / "bench" / "load_baseline.json"
+GAME_MODE = "Guess the Flag"
+KEY_FIELD, DISTRACTOR_KEY = "name", "flag_distractors"
+ACCURACY = 0.7  # chance a bot picks the right option
+# relative slowdown in throughput or a call's median reported as a regression; p99 is shown but not
+# compared, since with every bot a thread in one process it mostly measures thread scheduling
+REGRESSION_TOLERANCE = 0.3
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def command_counts(r) -> Counter:
+    """Calls per command so far from INFO commandstats; empty where the server has INFO disabled."""
+    try:
+        stats = r.info("commandstats")
+    except Exception:  # some managed Redis services rename or block INFO
+        return Counter()
+    return Counter({name[len("cmdstat_"):]: calls["calls"] for name, calls in stats.items()})
+
+def play_lobby(lobby: int, players: int, deck, seed: int, timings) -> None:
+    """Run one game with `players` bot threads; bot 0 hosts."""
+    import multiplayer_game as mg
+
+    barrier = threading.Barrier(players)
+    game = {}
+
+    def timed(op, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[op].append(time.perf_counter() - start)
+        return result
+
+    def bot(index: int) -> None:
+        uid, name = f"bot{lobby}-{index}", f"Bot {lobby}.{index}"
+        rng = random.Random(seed * 1000 + index)
+        host = index == 0
+        if host:
+            game["id"] = timed("create_game", mg.create_game, uid, name, {"num_rounds": len(deck), "bench": True})
+        barrier.wait()
+        game_id = game["id"]
+        if not host:
+            timed("join_game", mg.join_game, game_id, uid, name)
+        barrier.wait()
+        if host:
+            timed("start_game", mg.start_game, game_id, uid, [], len(deck[0]["options"]), len(deck))
+            timed("publish_deck", mg.publish_deck, game_id, deck, {"seed": seed})
+        for round_index, round_data in enumerate(deck):
+            if host:
+                timed("publish_round", mg.publish_round, game_id, round_index)
+            barrier.wait()
+            timed("load_game", mg.load_game, game_id, deck)
+            correct = round_data["answer"][KEY_FIELD]
+            wrong = [option for option in round_data["options"] if option != correct]
+            answer = correct if rng.random() < ACCURACY or not wrong else rng.choice(wrong)
+            timed("submit_answer", mg.submit_answer, game_id, uid, answer)
+            barrier.wait()
+            if host:
+                timed("award_scores", mg.award_scores, game_id, correct)
+        if host:
+            timed("end_game", mg.end_game, game_id)
+
+    threads = [threading.Thread(target=bot, args=(index,)) for index in range(players)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def run(lobbies: int, players: int, num_rounds: int, seed: int):
+    import streamlit as st
+    import country_index
+    import multiplayer_game as mg
+    import rounds
+    import session
+
+    st.session_state.current_game = GAME_MODE
+    deck = rounds.build_deck(range(len(country_index.get_index().countries)), KEY_FIELD, DISTRACTOR_KEY, True, 4, num_rounds, True, seed)
+    r = session.get_redis_connection()
+    mg.server_time()  # measure the clock offset outside the timed calls
+    before = command_counts(r)
+
+    timings = defaultdict(list)
+    threads = [threading.Thread(target=play_lobby, args=(lobby, players, deck, seed + lobby, timings)) for lobby in range(lobbies)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    commands = command_counts(r) - before
+    commands.pop("info", None)
+    calls = sum(len(samples) for samples in timings.values())
+    return {
+        "config": {"lobbies": lobbies, "players": players, "rounds": len(deck)},
+        "seconds": elapsed,
+        "calls_per_second": calls / elapsed,
+        "games_per_second": lobbies / elapsed,
+        "latency_ms": {
+            op: {"calls": len(samples), "p50": percentile(samples, 0.5) * 1000, "p99": percentile(samples, 0.99) * 1000}
+            for op, samples in timings.items()
+        },
+        "commands_per_game": sum(commands.values()) / lobbies if commands else None,
+        "commands": dict(commands.most_common()),
+    }
+
+def report(result) -> None:
+    config = result["config"]
+    print(f"{config['lobbies']} lobbies x {config['players']} players x {config['rounds']} rounds in {result['seconds']:.2f} s")
+    print(f"  {result['calls_per_second']:.0f} API calls/s, {result['games_per_second']:.1f} games/s")
+    print(f"  {'call':<14}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for op, stats in result["latency_ms"].items():
+        print(f"  {op:<14}{stats['calls']:>8}{stats['p50']:>10.2f}{stats['p99']:>10.2f}")
+    if result["commands_per_game"] is None:
+        print("  Redis command counts unavailable (INFO commandstats failed)")
+    else:
+        print(f"  {result['commands_per_game']:.0f} Redis commands per game: " + ", ".join(f"{name} {calls}" for name, calls in result["commands"].items()))
+
+def regressions(result, baseline):
+    """Ways `result` is worse than `baseline`; empty if they are comparable and it is not."""
+    found = []
+    if result["calls_per_second"] < baseline["calls_per_second"] * (1 - REGRESSION_TOLERANCE):
+        found.append(f"throughput {result['calls_per_second']:.0f} calls/s vs {baseline['calls_per_second']:.0f}")
+    for op, stats in result["latency_ms"].items():
+        before = baseline["latency_ms"].get(op)
+        if before and stats["p50"] > before["p50"] * (1 + REGRESSION_TOLERANCE):
+            found.append(f"{op} p50 {stats['p50']:.2f} ms vs {before['p50']:.2f}")
+    # the command count per game is deterministic, so any increase is a change in the code
+    if None not in (result["commands_per_game"], baseline["commands_per_game"]) and result["commands_per_game"] > baseline["commands_per_game"]:
+        found.append(f"{result['commands_per_game']:.0f} commands per game vs {baseline['commands_per_game']:.0f}")
+    return found
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("memory", "redis"), default="memory")
+    parser.add_argument("--lobbies", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4, help="bot players per lobby, host included")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # selected before session is imported; the redis backend reads the ENV section of secrets.toml like the app
+    os.environ["ENV"] = "memory" if args.backend == "memory" else os.environ.get("ENV", "redis-local")
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    logging.disable(logging.WARNING)  # streamlit warns about running without a script context
+
+    result = run(args.lobbies, args.players, args.rounds, args.seed)
+    report(result)
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if args.save_baseline:
+        baselines[args.backend] = result
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"saved as the {args.backend} baseline")
+    elif baselines.get(args.backend, {}).get("config") == result["config"]:
+        found = regressions(result, baselines[args.backend])
+        print("regressions vs baseline: " + ("; ".join(found) if found else "none"))
+        sys.exit(1 if found else 0)
+    else:
+        print(f"no {args.backend} baseline for this configuration; run with --save-baseline to record one")
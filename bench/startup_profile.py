@@ -0,0 +1,78 @@
+"""Startup profile: import cost of the app's modules, and a single-player game with Redis unreachable or hung.
+
+    python bench/startup_profile.py
+"""
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+MODULES = ("streamlit", "redis", "country_index", "assets", "rounds", "styles", "session", "multiplayer_game", "game")
+UNREACHABLE_REDIS = {"REDIS_HOST": "127.0.0.1", "REDIS_PORT": 1}
+
+def hung_redis():
+    """Settings for a local server that accepts connections but never replies, and the socket behind it."""
+    listener = socket.create_server(("127.0.0.1", 0), backlog=128)
+    return {"REDIS_HOST": "127.0.0.1", "REDIS_PORT": listener.getsockname()[1]}, listener
+
+def import_profile(module: str):
+    """(cumulative ms, whether redis got imported) for a cold `import module`, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative_us)))
+    return rows[-1][1] / 1000, any(name == "redis" for name, _ in rows)
+
+def single_player_run(redis_settings):
+    """Time each step of a single-player flag game against the Redis server in `redis_settings`."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()  # a fresh client (and lobby list) for each server
+    page = next((ROOT / "pages").glob("01_*.py"))
+    at = AppTest.from_file(str(page), default_timeout=120)
+    at.secrets[os.getenv("ENV", "redis-cloud")] = redis_settings
+    at.session_state.uid = "profile"
+    at.session_state.username = "Profile"
+
+    steps = []
+    def step(label, action):
+        start = time.perf_counter()
+        action()
+        steps.append((label, (time.perf_counter() - start) * 1000, list(at.exception)))
+
+    step("setup screen", at.run)
+    start_button = next(b for b in at.button if b.label == "Start Singleplayer Game")
+    step("start game", lambda: start_button.click().run())
+    step("choose answer", lambda: at.radio(key="multiple_choice").set_value(at.session_state.correct).run())
+    submit = next(b for b in at.button if b.label == "Submit Answer")
+    # includes the 3 s pause run_game keeps on the correct/incorrect message
+    step("submit answer", lambda: submit.click().run())
+    return steps, at.session_state.score
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+
+    print("cold import (ms, cumulative)")
+    for module in MODULES:
+        ms, loads_redis = import_profile(module)
+        print(f"  {module:<18} {ms:8.1f}{'  (loads redis)' if loads_redis and module != 'redis' else ''}")
+
+    hung_settings, listener = hung_redis()
+    for server, settings in (("unreachable", UNREACHABLE_REDIS), ("accepting but never replying", hung_settings)):
+        print(f"single-player flag game, Redis {server} (ms)")
+        steps, score = single_player_run(settings)
+        for label, ms, exceptions in steps:
+            print(f"  {label:<18} {ms:8.1f}{'  ' + str(exceptions) if exceptions else ''}")
+        print(f"  score after one round: {score}")
+    listener.close()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import marshal
+import os
+import pathlib
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+import streamlit as st
+
+DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "data" / "countries.json"
+# the built index, marshalled; rewritten whenever countries.json or COMPILED_VERSION changes
+COMPILED_PATH = DATA_PATH.with_suffix(".compiled")
+COMPILED_VERSION = 1  # bump when build_index's output changes shape
+ANSWER_FIELDS = ("name", "capital")  # fields players are asked to answer with
+DISTRACTOR_FIELDS = ("flag_distractors", "capital_distractors")
+
+class CountryIndex(NamedTuple):
+    """Read-only lookups over countries.json, built once per process.
+
+    Lookups by name, code and answer value return tuples of ids, because neither names
+    ("Georgia") nor codes (US states vs. countries) are unique in the dataset.
+    """
+    countries: Tuple[Mapping[str, Any], ...]
+    by_name: Mapping[str, Tuple[int, ...]]
+    by_code: Mapping[str, Tuple[int, ...]]
+    by_type: Mapping[str, Tuple[int, ...]]
+    # answer field -> exact value -> ids
+    by_field: Mapping[str, Mapping[str, Tuple[int, ...]]]
+    # answer field -> normalized value -> ids
+    by_answer: Mapping[str, Mapping[str, Tuple[int, ...]]]
+    # (distractor field, answer field) -> per-country ids whose answer field is listed as a distractor
+    distractor_ids: Mapping[Tuple[str, str], Tuple[Tuple[int, ...], ...]]
+
+def normalize_answer(value: str) -> str:
+    return value.strip().lower()
+
+def _group(pairs: Iterable[Tuple[str, int]]) -> Mapping[str, Tuple[int, ...]]:
+    groups: Dict[str, List[int]] = {}
+    for key, country_id in pairs:
+        groups.setdefault(key, []).append(country_id)
+    return MappingProxyType({key: tuple(ids) for key, ids in groups.items()})
+
+def build_index(raw_countries: List[Dict[str, Any]]) -> CountryIndex:
+    countries = []
+    for country_id, raw in enumerate(raw_countries):
+        entry = dict(raw, id=country_id)
+        for field in DISTRACTOR_FIELDS:
+            entry[field] = tuple(entry[field])
+        countries.append(MappingProxyType(entry))
+    countries = tuple(countries)
+
+    by_field = MappingProxyType({
+        field: _group((c[field], c["id"]) for c in countries if c[field] != "")
+        for field in ANSWER_FIELDS
+    })
+    by_answer = MappingProxyType({
+        field: _group((normalize_answer(c[field]), c["id"]) for c in countries if c[field] != "")
+        for field in ANSWER_FIELDS
+    })
+    distractor_ids = MappingProxyType({
+        (distractor_field, field): tuple(
+            tuple(i for value in c[distractor_field] for i in by_field[field].get(value, ()) if i != c["id"])
+            for c in countries
+        )
+        for distractor_field in DISTRACTOR_FIELDS
+        for field in ANSWER_FIELDS
+    })
+    return CountryIndex(
+        countries=countries,
+        by_name=by_field["name"],
+        by_code=_group((c["code"], c["id"]) for c in countries),
+        by_type=_group((c["type"], c["id"]) for c in countries),
+        by_field=by_field,
+        by_answer=by_answer,
+        distractor_ids=distractor_ids,
+    )
+
+def _freeze(plain: Dict[str, Any]) -> CountryIndex:
+    """Wrap the plain dicts and tuples of a compiled index in read-only views."""
+    nested = lambda groups: MappingProxyType({field: MappingProxyType(ids) for field, ids in groups.items()})
+    by_field = nested(plain["by_field"])
+    return CountryIndex(
+        countries=tuple(MappingProxyType(c) for c in plain["countries"]),
+        by_name=by_field["name"],
+        by_code=MappingProxyType(plain["by_code"]),
+        by_type=MappingProxyType(plain["by_type"]),
+        by_field=by_field,
+        by_answer=nested(plain["by_answer"]),
+        distractor_ids=MappingProxyType(plain["distractor_ids"]),
+    )
+
+def _thaw(index: CountryIndex) -> Dict[str, Any]:
+    nested = lambda groups: {field: dict(ids) for field, ids in groups.items()}
+    return {
+        "countries": tuple(dict(c) for c in index.countries),
+        "by_code": dict(index.by_code),
+        "by_type": dict(index.by_type),
+        "by_field": nested(index.by_field),
+        "by_answer": nested(index.by_answer),
+        "distractor_ids": dict(index.distractor_ids),
+    }
+
+def load_index() -> CountryIndex:
+    """Load the compiled index if it was built from this countries.json, else build it and compile it.
+
+    Unmarshalling skips both the JSON parse and build_index. Writing the compiled file is
+    best-effort; a read-only checkout just builds the index on every cold start.
+    """
+    raw = DATA_PATH.read_bytes()
+    source_hash = hashlib.sha256(raw).hexdigest()
+    try:
+        version, compiled_hash, plain = marshal.loads(COMPILED_PATH.read_bytes())
+        if version == COMPILED_VERSION and compiled_hash == source_hash:
+            return _freeze(plain)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    index = build_index(json.loads(raw))
+    try:
+        tmp_path = COMPILED_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(marshal.dumps((COMPILED_VERSION, source_hash, _thaw(index))))
+        os.replace(tmp_path, COMPILED_PATH)
+    except OSError:
+        pass
+    return index
+
+@st.cache_resource
+def get_index() -> CountryIndex:
+    """The shared index for every session in the process.
+
+    Each entry's "id" is its position in countries.json. Ids are what the multiplayer
+    protocol sends over Redis, since every node loads the same file and codes are not unique.
+    """
+    return load_index()
+
+def get_country(country_id: int) -> Mapping[str, Any]:
+    return get_index().countries[country_id]
+
+def ids_of_type(*types: str) -> List[int]:
+    by_type = get_index().by_type
+    return [i for t in types for i in by_type.get(t, ())]
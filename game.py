@@ -1,74 +1,59 @@
 import streamlit as st
-import random
+import math
 import time
-import json
-import pathlib
+import random
 import multiplayer_game as mg
+import session
 import styles
-from streamlit_autorefresh import st_autorefresh
-
-@st.cache_data
-def load_countries():
-    data_path = pathlib.Path(__file__).resolve().parents[0] / "data" / "countries.json"
-    with open(data_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+import country_index
+import assets
+
+EVENT_POLL_INTERVAL = 0.5  # seconds between checks of the game's event stream
+# seconds a client that has answered blocks on the stream per check; a host's Proceed click waits at most this long
+EVENT_WAIT_TIMEOUT = 2
+RESULT_SECONDS = 3  # seconds a round's result stays up before the next question
+# rendered width of the question image: the middle of three columns in the centered layout,
+# or the full width once Streamlit stacks columns on narrow screens
+IMAGE_SIZES = "(max-width: 640px) 100vw, 368px"
+IMAGE_FRAME_STYLE = (
+    "background: white; padding: 2rem; border-radius: 25px; border: 5px solid transparent; "
+    "background: linear-gradient(white, white) padding-box, linear-gradient(135deg, #4CAF50 0%, #EC407A 100%) border-box; "
+    "box-shadow: 0 10px 30px rgba(236, 64, 122, 0.3); margin: 2rem 0;"
+)
+
+def deal_round(pool, key_field: str, distractor_key: str, num_options: int, num_rounds: int, verify_distractors=True, publish_to_game_id: str = None):
+    """Next round of this game's deck, or None once it is used up."""
+    game_id = publish_to_game_id or ""
+    deck = mg.get_cached_deck(game_id)
+    if deck is None:
+        pool = tuple(pool)
+        spec = {
+            "key_field": key_field,
+            "distractor_key": distractor_key,
+            "multiple_choice": st.session_state.input == "Multiple Choice",
+            "num_options": num_options,
+            "num_rounds": num_rounds,
+            "verify_distractors": verify_distractors,
+            "seed": random.randrange(2 ** 32),
+        }
+        deck = mg.cache_deck(game_id, mg.deck_key(pool, spec))
+        if publish_to_game_id:
+            mg.publish_deck(publish_to_game_id, deck, spec)
 
-def generate_round(pool, key_field: str, distractor_key: str, num_options: int = 4, verify_distractors=True, publish_to_game_id: str = None):
-    if not pool:
+    round_index = st.session_state.rounds
+    if round_index >= len(deck):
         return None
+    if publish_to_game_id:
+        # every round after the first is dealt while the previous result is still showing
+        mg.publish_round(publish_to_game_id, round_index, st.session_state.get("round_seconds", mg.ROUND_SECONDS), starts_in=RESULT_SECONDS if round_index else 0)
+    return deck[round_index]
 
-    pool = [c for c in pool if c[key_field] != ""]
-
-    answer = random.choice(pool)
-
-    # remove answer from pool
-    remaining = [c for c in pool if c != answer and c[key_field] != ""]
+@st.cache_resource
+def playable_pool(image_key: str, types: tuple) -> tuple:
+    """Ids whose `image_key` image passed the asset check, shared by every session."""
+    return tuple(assets.playable_ids(image_key, country_index.ids_of_type(*types)))
 
-    if st.session_state.input == "Text Entry":
-        if publish_to_game_id:
-            mg.publish_round(publish_to_game_id, {
-                "answer": answer,
-                "options": [],
-                "key_field": key_field,
-            })
-        return {
-            "answer": answer,
-            "options": [],
-            "key_field": key_field,
-        }, remaining
-    else:
-        # sample distractors
-        distractor_list = answer[distractor_key]
-        distractors = []
-        options = []
-        if verify_distractors:
-            distractors = [d for d in remaining if d[key_field] in distractor_list]
-            distractors = random.sample(distractors, k=min(num_options - 1, len(distractors)))
-            if len(distractors) < min(num_options - 1, len(remaining)):
-                extend_list = [a for a in remaining if a not in distractors and a["name"] != answer["name"]]
-                distractors.extend(random.sample(extend_list, k=(min(num_options - 1, len(remaining)) - len(distractors))))
-            options = [d[key_field] for d in distractors] + [answer[key_field]]
-        else:
-            distractors = distractor_list
-            distractors = random.sample(distractors, k=min(num_options - 1, len(distractors)))
-            if len(distractors) < min(num_options - 1, len(remaining)):
-                extend_list = [a[key_field] for a in remaining if a[key_field] not in distractors and a["name"] != answer["name"]]
-                distractors.extend(random.sample(extend_list, k=(min(num_options - 1, len(remaining)) - len(distractors))))
-            options = distractors + [answer[key_field]]
-    
-    if publish_to_game_id:
-        mg.publish_round(publish_to_game_id, {
-            "answer": answer,
-            "options": options,
-            "key_field": key_field,
-        })
-    return {
-        "answer": answer,
-        "options": options,
-        "key_field": key_field,
-    }, remaining
-
-def setup_screen(countries):
+def setup_screen(image_key: str):
     col1, col2 = st.columns([2, 1], gap="large")
     game_id = None
     with col1:  # game settings
@@ -92,46 +77,39 @@ def setup_screen(countries):
         if input == "Multiple Choice":
             num_options = st.slider("Number of choices", 2, 10, 4, disabled="current_game_id" in st.session_state)
         num_rounds = st.slider("Number of rounds", 1, 50, 10, disabled="current_game_id" in st.session_state)
+        round_seconds = st.slider("Seconds per round (multiplayer)", 10, 120, mg.ROUND_SECONDS, step=5, disabled="current_game_id" in st.session_state)
+        selected_types = tuple(t for t, checked in (("nation", nations), ("territory", territories), ("us_state", us_states)) if checked)
 
         st.session_state.score = 0
         st.session_state.rounds = 0
         update_score()
 
         if st.button("Start Singleplayer Game", disabled="current_game_id" in st.session_state or (not nations and not territories and not us_states)):
-            pool = []
-            if nations:
-                pool.extend([c for c in countries if c["type"] == "nation"])
-            if territories:
-                pool.extend([c for c in countries if c["type"] == "territory"])
-            if us_states:
-                pool.extend([c for c in countries if c["type"] == "us_state"])
+            mg.clear_cached_deck()
             st.session_state.game_started = True
-            st.session_state.pool = pool
+            st.session_state.pool = playable_pool(image_key, selected_types)
             st.session_state.input = input
             st.session_state.num_options = num_options
             st.session_state.num_rounds = num_rounds
             st.rerun()
 
         elif st.button("Create Multiplayer Lobby", disabled="current_game_id" in st.session_state or (not nations and not territories and not us_states)):
-            pool = []
-            if nations:
-                pool.extend([c for c in countries if c["type"] == "nation"])
-            if territories:
-                pool.extend([c for c in countries if c["type"] == "territory"])
-            if us_states:
-                pool.extend([c for c in countries if c["type"] == "us_state"])
+            pool = playable_pool(image_key, selected_types)
+            # the pool reaches Redis once, in the game state start_game writes; every view reads the options
             options = {
-                "pool": pool,
                 "input": input,
                 "num_options": num_options,
-                "num_rounds": num_rounds
+                "num_rounds": num_rounds,
+                "round_seconds": round_seconds,
             }
+            session.join_multiplayer()
             game_id = mg.create_game(st.session_state.uid, st.session_state.username, options)
             st.session_state.current_game_id = game_id
             st.session_state.pool = pool
             st.session_state.input = input
             st.session_state.num_options = num_options
             st.session_state.num_rounds = num_rounds
+            st.session_state.round_seconds = round_seconds
             st.rerun()
 
     with col2:  # multiplayer lobbies
@@ -147,44 +125,54 @@ def setup_screen(countries):
             <h2 style="color: white !important; margin: 0 !important; font-size: 2rem !important; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">🎮 Join Lobby</h2>
         </div>
         """, unsafe_allow_html=True)
-        lobbies = mg.list_lobbies()
-        for lobby in lobbies:
-            if lobby['game_mode'] != st.session_state.current_game:
-                continue
-            if st.button(f"Join {lobby['host_name']}'s game", key=f"join_{lobby['game_id']}"):
-                mg.join_game(lobby["game_id"], st.session_state.uid, st.session_state.username)
-                st.session_state.current_game_id = lobby["game_id"]
-                st.rerun()
+        lobby_list()
+
+@st.fragment(run_every=mg.LOBBY_REFRESH_INTERVAL)
+def lobby_list():
+    """Join buttons for the open lobbies, from the process-wide list."""
+    listing = mg.cached_lobbies(st.session_state.current_game)
+    if listing["error"]:
+        st.warning("Multiplayer lobbies are unavailable right now.")
+    if listing["lobbies"] is None:
+        if not listing["error"]:
+            st.caption("Loading lobbies...")
+        return
+    for lobby in listing["lobbies"]:
+        if st.button(f"Join {lobby['host_name']}'s game", key=f"join_{lobby['game_id']}"):
+            session.join_multiplayer()
+            mg.join_game(lobby["game_id"], st.session_state.uid, st.session_state.username)
+            st.session_state.current_game_id = lobby["game_id"]
+            st.rerun()
 
 def show_image_question(round_data, image_dir, image_key, question_text, answer_key="name", multiple_choice=True):
     if round_data is None:
         st.rerun()
     answer = round_data["answer"]
     st.session_state.correct = answer[answer_key]
-    image_path = image_dir / answer[image_key]
+    image_html = static_image_html(image_dir, answer[image_key]) if answer[image_key] else None
+    image_bytes = assets.read_image(image_dir, answer[image_key]) if answer[image_key] and image_html is None else None
 
     # Create centered container for image
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if not answer[image_key]:
             st.warning(f"No image specified for {answer['name']}")
-        elif image_path.exists():
-            st.markdown("""
-            <div style="
-                background: white;
-                padding: 2rem;
-                border-radius: 25px;
-                border: 5px solid transparent;
-                background: linear-gradient(white, white) padding-box,
-                            linear-gradient(135deg, #4CAF50 0%, #EC407A 100%) border-box;
-                box-shadow: 0 10px 30px rgba(236, 64, 122, 0.3);
-                margin: 2rem 0;
-            ">
+        elif image_html is not None:
+            # static files let the browser cache the image across rounds and games
+            st.markdown(f"""
+            <div style="{IMAGE_FRAME_STYLE}">
+                {image_html}
+            </div>
             """, unsafe_allow_html=True)
-            st.image(str(image_path), use_container_width=True)
+        elif image_bytes is not None:
+            st.markdown(f"""
+            <div style="{IMAGE_FRAME_STYLE}">
+            """, unsafe_allow_html=True)
+            st.image(image_bytes, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         else:
             st.warning(f"Image not found: {answer[image_key]}")
+    prefetch_next_image(image_dir, image_key)
     if multiple_choice:
         options = round_data["options"]
         submitted = show_multiple_choice_options(question_text, options)
@@ -192,10 +180,63 @@ def show_image_question(round_data, image_dir, image_key, question_text, answer_
         submitted = show_text_entry(question_text)
     return submitted
 
+def static_image_html(image_dir, filename):
+    """HTML for the image from an atlas or static URL, or None to fall back to st.image."""
+    tile = assets.atlas_tile(image_dir, filename)
+    if tile is not None:
+        # percentage offsets and size keep the crop aligned however wide the column renders
+        spare_width, spare_height = tile["sheet_width"] - tile["width"], tile["sheet_height"] - tile["height"]
+        x = tile["x"] / spare_width * 100 if spare_width else 0
+        y = tile["y"] / spare_height * 100 if spare_height else 0
+        return (
+            f'<div style="width: 100%; aspect-ratio: {tile["width"]} / {tile["height"]}; '
+            f'background: url(\'{tile["url"]}\') {x:.4f}% {y:.4f}% / {tile["sheet_width"] / tile["width"] * 100:.4f}% auto no-repeat;"></div>'
+        )
+    url = assets.image_url(image_dir, filename)
+    if url is not None:
+        return f'<img {_image_sources(url, assets.image_srcset(image_dir, filename))} style="width: 100%; display: block;">'
+    return None
+
+def _image_sources(url, srcset):
+    if srcset is None:
+        return f'src="{url}"'
+    return f'src="{url}" srcset="{srcset}" sizes="{IMAGE_SIZES}"'
+
+
+def prefetch_next_image(image_dir, image_key):
+    """Load the next round's image in a hidden container so the browser has it cached."""
+    deck = mg.get_cached_deck(st.session_state.get("current_game_id", "")) or []
+    # a guest's deck position is the host's round_index, which differs from `rounds` after a mid-game join or a forfeit
+    round_index = st.session_state.get("round_index")
+    next_index = (st.session_state.rounds if round_index is None else round_index) + 1
+    if next_index >= len(deck):
+        return
+    filename = deck[next_index]["answer"][image_key]
+    if not filename:
+        return
+    tile = assets.atlas_tile(image_dir, filename)
+    image_url = tile["url"] if tile is not None else assets.image_url(image_dir, filename)
+    image_bytes = assets.read_image(image_dir, filename) if image_url is None else None
+    if image_url is None and image_bytes is None:
+        return
+    # same srcset and sizes as the question image, so the browser picks the same file now
+    srcset = assets.image_srcset(image_dir, filename) if tile is None and image_url is not None else None
+    with st.container(key="prefetch_image"):
+        st.markdown("<style>.st-key-prefetch_image { display: none; }</style>", unsafe_allow_html=True)
+        if image_url is not None:
+            st.markdown(f'<img {_image_sources(image_url, srcset)}>', unsafe_allow_html=True)
+        else:
+            st.image(image_bytes, use_container_width=True)
+
 def update_score():
     st.session_state.score_display = f"{st.session_state.score} / {st.session_state.rounds} - {round(st.session_state.score/st.session_state.rounds * 100) if st.session_state.rounds > 0 else 0}%"
 
+def in_singleplayer_game():
+    return st.session_state.get("game_started", False) and not st.session_state.get("current_game_id")
+
 def init_game(game_title):
+    # init_game runs at the top of every page script, so each rerun starts with a fresh game snapshot
+    mg.invalidate_snapshot()
     if "current_game" not in st.session_state or st.session_state.current_game != game_title:
         st.session_state.game_started = False
         st.session_state.current_game = game_title
@@ -215,7 +256,7 @@ def show_multiple_choice_options(question_text, options):
         <h3 style="color: #C2185B !important; text-align: center; margin: 0 !important; font-size: 1.8rem !important; font-weight: 700 !important; text-shadow: 1px 1px 2px rgba(255,255,255,0.8);">{question_text}</h3>
     </div>
     """, unsafe_allow_html=True)
-    choice = st.radio("Select your answer:", sorted(options), index=None, key="multiple_choice", label_visibility="collapsed")
+    choice = st.radio("Select your answer:", sorted(options), index=None, key="multiple_choice", label_visibility="collapsed", disabled=answered())
     return choice
 
 def show_text_entry(question_text):
@@ -231,9 +272,13 @@ def show_text_entry(question_text):
         <h3 style="color: #C2185B !important; text-align: center; margin: 0 !important; font-size: 1.8rem !important; font-weight: 700 !important; text-shadow: 1px 1px 2px rgba(255,255,255,0.8);">{question_text}</h3>
     </div>
     """, unsafe_allow_html=True)
-    entry = st.text_input("Type your answer:", key="text_entry", label_visibility="visible")
+    entry = st.text_input("Type your answer:", key="text_entry", label_visibility="visible", disabled=answered())
     return entry
 
+def answered():
+    """Whether the current round has been answered or forfeited."""
+    return st.session_state.get("submitted") is not None
+
 def submit_answer():
     if st.session_state.input == "Multiple Choice":
         st.session_state.submitted = st.session_state.multiple_choice
@@ -241,21 +286,41 @@ def submit_answer():
     else:
         st.session_state.submitted = st.session_state.text_entry
         st.session_state.text_entry = ""
-    mg.submit_answer(st.session_state.get("current_game_id", ""), st.session_state.uid, st.session_state.submitted)
+    if st.session_state.get("current_game_id"):
+        try:
+            mg.submit_answer(st.session_state.current_game_id, st.session_state.uid, st.session_state.submitted)
+        except TimeoutError:
+            # the server closed the round before this answer arrived; it counts as a forfeit
+            st.session_state.submitted = ""
+
+def pull_guest_round(game_id):
+    """The round the host revealed, recording its deck index."""
+    st.session_state.round_index = mg.get_snapshot(game_id)["round_index"]
+    return mg.pull_question_data(game_id)
 
 def run_game(pool, num_options, num_rounds, key_field, distractor_key, show_question_fn, verify_distractors=True):
+    game_id = st.session_state.get("current_game_id", "")
+    view = mg.get_snapshot(game_id)
+    is_host = view["host"] == st.session_state.uid
+    is_guest = view["host"] is not None and not is_host
+
     if "round" not in st.session_state or st.session_state.round is None:
-        if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) is not None and mg.get_game_host_uid(st.session_state.get("current_game_id", "")) != st.session_state.uid:
-            round_data = mg.pull_question_data(st.session_state.get("current_game_id", ""))
+        if is_guest:
+            round_data = pull_guest_round(game_id)
         else:
-            round_data, pool = generate_round(pool, key_field, distractor_key, num_options, verify_distractors, publish_to_game_id=st.session_state.get("current_game_id") if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) == st.session_state.uid else None)
-            st.session_state.pool = pool
+            round_data = deal_round(pool, key_field, distractor_key, num_options, num_rounds, verify_distractors, publish_to_game_id=game_id if is_host else None)
         st.session_state.round = round_data
 
+    # A round is forfeited once its deadline passes, or when the host has already revealed a later one
+    seconds_left = mg.seconds_left(view)
+    behind = is_guest and None not in (view["round_index"], st.session_state.get("round_index")) and view["round_index"] > st.session_state.round_index
+    if st.session_state.get("submitted") is None and (behind or (seconds_left is not None and seconds_left <= 0)):
+        st.session_state.submitted = ""
+
     # Show leaderboard for multiplayer games
     if "current_game_id" in st.session_state and st.session_state.current_game_id:
-        leaderboard = mg.get_leaderboard(st.session_state.current_game_id)
-        if len(leaderboard) > 1:  # Only show if there are multiple players
+        leaderboard = mg.get_leaderboard(game_id, st.session_state.uid)
+        if leaderboard["total"] > 1:  # Only show if there are multiple players
             styles.show_leaderboard(leaderboard, st.session_state.uid)
 
     # Show round counter
@@ -282,18 +347,17 @@ def run_game(pool, num_options, num_rounds, key_field, distractor_key, show_ques
     # Center the submit button
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
-        if st.button("Submit Answer", disabled=submitted is None or submitted == "" or st.session_state.rounds == num_rounds, on_click=submit_answer, use_container_width=True):
+        if st.button("Submit Answer", disabled=answered() or submitted is None or submitted == "" or st.session_state.rounds == num_rounds, on_click=submit_answer, use_container_width=True):
             st.rerun()
     
     if "submitted" in st.session_state and st.session_state.submitted is not None:
         check_correct_answer()
         update_score()
-        if st.session_state.rounds < num_rounds and st.session_state.pool:
-            if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) is not None and mg.get_game_host_uid(st.session_state.get("current_game_id", "")) != st.session_state.uid:
-                round_data = mg.pull_question_data(st.session_state.get("current_game_id", ""))
+        if st.session_state.rounds < num_rounds and (is_guest or st.session_state.rounds < len(mg.get_cached_deck(game_id) or [])):
+            if is_guest:
+                round_data = pull_guest_round(game_id)
             else:
-                round_data, pool = generate_round(pool, key_field, distractor_key, num_options, verify_distractors, publish_to_game_id=st.session_state.get("current_game_id") if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) == st.session_state.uid else None)
-                st.session_state.pool = pool
+                round_data = deal_round(pool, key_field, distractor_key, num_options, num_rounds, verify_distractors, publish_to_game_id=game_id if is_host else None)
             st.session_state.round = round_data
         else:
             percentage = round(st.session_state.score/st.session_state.rounds * 100) if st.session_state.rounds > 0 else 0
@@ -346,29 +410,33 @@ def run_game(pool, num_options, num_rounds, key_field, distractor_key, show_ques
                 </div>
             </div>
             """, unsafe_allow_html=True)
-            if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) == st.session_state.uid:
-                mg.end_game(st.session_state.get("current_game_id", ""))
+            if is_host:
+                mg.end_game(game_id)
+            mg.clear_cached_deck()
             st.session_state.game_started = False
             st.session_state.pop("current_game_id", None)
-        time.sleep(3)
+            st.session_state.pop("round_index", None)
+        time.sleep(RESULT_SECONDS)
         st.rerun()
     
     st.markdown("<br>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
-        if st.button("🔄 Reset Game", disabled=mg.get_game_host_uid(st.session_state.get("current_game_id", "")) is not None and mg.get_game_host_uid(st.session_state.get("current_game_id", "")) != st.session_state.uid, use_container_width=True):
+        if st.button("🔄 Reset Game", disabled=is_guest, use_container_width=True):
             keys_to_clear = [
                 "game_started",
                 "pool",
                 "num_options",
                 "num_rounds",
+                "round_seconds",
                 "score",
                 "rounds",
                 "current",
-                "countries",
                 "score_display",
                 "current_game",
                 "round",
+                "round_index",
+                "deck",
                 "game_title",
                 "correct"
             ]
@@ -378,38 +446,82 @@ def run_game(pool, num_options, num_rounds, key_field, distractor_key, show_ques
             st.rerun()
 
 def check_correct_answer():
-    while (not mg.check_all_answers_submitted(st.session_state.get("current_game_id", "")) and
-           mg.get_game_host_uid(st.session_state.get("current_game_id", "")) == st.session_state.uid and
+    game_id = st.session_state.get("current_game_id", "")
+    view = mg.get_snapshot(game_id)
+    is_host = view["host"] == st.session_state.uid
+    seconds_left = mg.seconds_left(view)
+    while (view["answer_count"] < len(view["players"]) and
+           is_host and
+           (seconds_left is None or seconds_left > 0) and
            not st.button("Proceed")) or (
-               mg.get_game_host_uid(st.session_state.get("current_game_id", "")) != st.session_state.uid and
-               mg.pull_question_data(st.session_state.get("current_game_id", "")) == st.session_state.round and
-               mg.get_game_status(st.session_state.get("current_game_id", "")) != "finished"):
+               not is_host and
+               view["round"] == st.session_state.round and
+               view["status"] != "finished"):
         st.warning("Waiting for all players to submit their answers...")
-        st.rerun()
+        # the game event listener reruns the page once something relevant happens
+        st.stop()
 
     st.session_state.rounds += 1
 
     # Check if correct
-    is_correct = st.session_state.submitted.lower().strip() == st.session_state.correct.lower().strip()
+    is_correct = country_index.normalize_answer(st.session_state.submitted) == country_index.normalize_answer(st.session_state.correct)
 
     if is_correct:
         st.session_state.score += 1
         st.success("Correct! 🎉")
+    elif st.session_state.submitted == "":
+        st.error(f"Time's up! The correct answer is **{st.session_state.correct}**.")
     else:
         st.error(f"Incorrect! The correct answer is **{st.session_state.correct}**.")
 
     # Update multiplayer scores if in a game
     if "current_game_id" in st.session_state and st.session_state.current_game_id:
         # Host awards scores to all players
-        if mg.get_game_host_uid(st.session_state.get("current_game_id", "")) == st.session_state.uid:
+        if is_host:
             mg.award_scores(st.session_state.current_game_id, st.session_state.correct)
 
     st.session_state.submitted = None
     st.session_state.round = None
 
-def conditional_autorefresh():
-    if "auto_refresh" not in st.session_state:
-        st.session_state.auto_refresh = False
-
-    if st.session_state.auto_refresh:
-        st_autorefresh(interval=5000, key="page_refresh")
+def watch_game_events():
+    """Rerun the page when another player changes the game, and show the round timer."""
+    game_id = st.session_state.get("current_game_id")
+    if not game_id:
+        return
+    view = mg.get_snapshot(game_id)
+    st.session_state.event_cursor = view["last_event_id"]
+    round_deadline = view["round_deadline"] if view["status"] == "in_progress" else None
+    _listen_for_game_events(game_id, view["host"] == st.session_state.uid, round_deadline, mg.server_time())
+
+@st.fragment(run_every=EVENT_POLL_INTERVAL)
+def _listen_for_game_events(game_id, is_host, round_deadline, rendered_at):
+    from redis.exceptions import RedisError
+
+    waiting = st.session_state.get("submitted") is not None
+    wait_seconds = EVENT_WAIT_TIMEOUT if waiting else None
+    if round_deadline is not None:
+        seconds_left = round_deadline - mg.server_time()
+        # players still answering forfeit, and the host scores the round, once time is up;
+        # a deadline that had already passed when the page rendered was handled by that run
+        if seconds_left <= 0 and round_deadline > rendered_at and (is_host or not waiting):
+            st.rerun(scope="app")
+        st.caption(f"⏱️ {math.ceil(max(seconds_left, 0))} s left in this round")
+        if wait_seconds is not None:
+            wait_seconds = max(0.001, min(wait_seconds, seconds_left))
+    try:
+        if wait_seconds is None:
+            events = mg.read_game_events(game_id, st.session_state.event_cursor)
+        else:
+            events = mg.wait_for_game_events(game_id, st.session_state.event_cursor, wait_seconds)
+    except RedisError:
+        return  # no news this time; the next run tries again
+    if not events:
+        return
+    st.session_state.event_cursor = events[-1]["id"]
+    for event in events:
+        if event["uid"] == st.session_state.uid:
+            continue
+        # only the host acts on the round closing; guests wait for it to be scored
+        if event["event"] == "round_closed" and not is_host:
+            continue
+        st.rerun(scope="app")
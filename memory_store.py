@@ -0,0 +1,458 @@
+"""In-process stand-in for the Redis client, for tests, benchmarks and single-node deployments.
+
+MemoryRedis implements the subset of the redis-py client the app uses (strings, hashes, lists,
+sets, sorted sets, streams, expiry, pipelines and scripts) with the same call signatures and
+decoded return values, so session.get_redis_connection can hand it out in place of a client.
+Every command runs under one lock, so a command, pipeline or script is atomic across threads.
+Lua can't run here: scripts run the Python equivalent registered for their source with `script`.
+"""
+import fnmatch
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+SWEEP_INTERVAL = 1.0  # seconds between sweeps for expired keys that are never read again
+
+# Python equivalents of Lua scripts, keyed by script source; see `script`
+SCRIPTS: Dict[str, Callable[["MemoryRedis", List[str], List[str]], Any]] = {}
+
+def script(source: str):
+    """Register the decorated fn(store, keys, args) as the in-memory equivalent of a Lua script.
+
+    The function runs under the store's lock with string args, like ARGV, and returns what the script would.
+    """
+    def register(fn):
+        SCRIPTS[source] = fn
+        return fn
+    return register
+
+class _SortedSet(dict):
+    """member -> score; ordered on read."""
+
+class _Stream(list):
+    """(id, fields) entries in id order."""
+    __slots__ = ("last_id",)
+
+    def __init__(self):
+        super().__init__()
+        self.last_id = (0, 0)
+
+def _encode(value) -> str:
+    """Encode a value the way redis-py does before sending it."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _span(length: int, start: int, end: int) -> range:
+    """Indexes covered by an inclusive Redis range, where negative positions count from the end."""
+    start = max(start + length if start < 0 else start, 0)
+    end = min(end + length if end < 0 else end, length - 1)
+    return range(start, end + 1)
+
+def _score_bound(bound) -> Tuple[float, bool]:
+    """(score, exclusive) for a ZRANGEBYSCORE bound such as 5, "(5", "-inf" or "+inf"."""
+    if isinstance(bound, str) and bound.startswith("("):
+        return float(bound[1:]), True
+    return float(bound), False
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    ms, _, seq = str(value).partition("-")
+    return int(ms), int(seq or 0)
+
+def _command(fn):
+    """Run a command under the store lock, counting it and expiring keys that are due."""
+    name = fn.__name__
+
+    def command(self, *args, **kwargs):
+        with self._lock:
+            self.command_counts[name] += 1
+            now = time.time()
+            if now >= self._next_sweep:
+                self._sweep(now)
+            return fn(self, *args, **kwargs)
+    command.__name__ = name
+    command.__doc__ = fn.__doc__
+    return command
+
+class MemoryScript:
+    """Callable returned by register_script, mirroring redis.commands.core.Script."""
+
+    def __init__(self, store: "MemoryRedis", source: str):
+        if source not in SCRIPTS:
+            raise KeyError("no in-memory equivalent is registered for this script; see memory_store.script")
+        self.store = store
+        self.source = source
+
+    def __call__(self, keys=(), args=(), client=None):
+        return (self.store if client is None else client).evalsha(self.source, list(keys), [_encode(arg) for arg in args])
+
+class MemoryPipeline:
+    """Queues commands and runs them in one atomic step on execute, like a MULTI/EXEC pipeline."""
+
+    def __init__(self, store: "MemoryRedis"):
+        self.store = store
+        self.commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(MemoryRedis, name, None)):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def execute(self) -> List[Any]:
+        commands, self.commands = self.commands, []
+        with self.store._lock:
+            return [getattr(self.store, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+class MemoryRedis:
+    """Thread-safe in-memory store answering the redis-py calls the app makes, with decode_responses=True."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stream_added = threading.Condition(self._lock)  # woken by XADD for blocking XREAD
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}  # key -> time.time() at which it expires
+        self._next_sweep = 0.0
+        self.command_counts: Counter = Counter()
+        # stands in for the client's pool, so session.redis_pool_stats works unchanged
+        self.connection_pool = self
+
+    # -- keyspace -------------------------------------------------------------
+
+    def _sweep(self, now: float) -> None:
+        for key in [key for key, deadline in self._expires.items() if deadline <= now]:
+            self._remove(key)
+        self._next_sweep = now + SWEEP_INTERVAL
+
+    def _remove(self, key: str) -> bool:
+        self._expires.pop(key, None)
+        return self._data.pop(key, None) is not None
+
+    def _live(self, key: str) -> bool:
+        """Whether key exists, removing it first if its expiry has passed."""
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self._remove(key)
+        return key in self._data
+
+    def _get(self, key: str, kind: type, create: bool = False):
+        """The value at key if it holds a `kind`; a new empty one when `create`, else None if missing."""
+        self._live(key)
+        value = self._data.get(key)
+        if value is None:
+            if not create:
+                return None
+            value = self._data[key] = kind()
+        elif type(value) is not kind:
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _drop_if_empty(self, key: str, value) -> None:
+        if not value:
+            self._remove(key)
+
+    @_command
+    def delete(self, *names: str) -> int:
+        return sum(self._remove(name) for name in names)
+
+    @_command
+    def exists(self, *names: str) -> int:
+        return sum(1 for name in names if self._live(name))
+
+    @_command
+    def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in list(self._data) if fnmatch.fnmatchcase(key, pattern) and self._live(key)]
+
+    @_command
+    def expire(self, name: str, time_seconds: int) -> bool:
+        if not self._live(name):
+            return False
+        self._expires[name] = time.time() + int(time_seconds)
+        return True
+
+    @_command
+    def ttl(self, name: str) -> int:
+        if not self._live(name):
+            return -2
+        deadline = self._expires.get(name)
+        return -1 if deadline is None else max(int(deadline - time.time() + 0.5), 0)
+
+    @_command
+    def time(self) -> Tuple[int, int]:
+        now = time.time()
+        return int(now), int(now % 1 * 1_000_000)
+
+    @_command
+    def ping(self) -> bool:
+        return True
+
+    # -- strings --------------------------------------------------------------
+
+    @_command
+    def get(self, name: str) -> Optional[str]:
+        return self._get(name, str)
+
+    @_command
+    def set(self, name: str, value, ex: int = None) -> bool:
+        self._remove(name)
+        self._data[name] = _encode(value)
+        if ex is not None:
+            self._expires[name] = time.time() + int(ex)
+        return True
+
+    # -- hashes ---------------------------------------------------------------
+
+    @_command
+    def hset(self, name: str, key: str = None, value=None, mapping: Dict[str, Any] = None) -> int:
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        if not fields:
+            raise ValueError("'hset' with no key value pairs")
+        hash_ = self._get(name, dict, create=True)
+        added = sum(1 for field in fields if field not in hash_)
+        hash_.update((_encode(field), _encode(value)) for field, value in fields.items())
+        return added
+
+    @_command
+    def hget(self, name: str, key: str) -> Optional[str]:
+        return (self._get(name, dict) or {}).get(key)
+
+    @_command
+    def hmget(self, name: str, keys, *args) -> List[Optional[str]]:
+        fields = [keys] + list(args) if isinstance(keys, str) else list(keys) + list(args)
+        hash_ = self._get(name, dict) or {}
+        return [hash_.get(field) for field in fields]
+
+    @_command
+    def hgetall(self, name: str) -> Dict[str, str]:
+        return dict(self._get(name, dict) or {})
+
+    @_command
+    def hlen(self, name: str) -> int:
+        return len(self._get(name, dict) or ())
+
+    @_command
+    def hdel(self, name: str, *keys: str) -> int:
+        hash_ = self._get(name, dict)
+        if hash_ is None:
+            return 0
+        removed = sum(1 for key in keys if hash_.pop(key, None) is not None)
+        self._drop_if_empty(name, hash_)
+        return removed
+
+    # -- lists ----------------------------------------------------------------
+
+    @_command
+    def lpush(self, name: str, *values) -> int:
+        items = self._get(name, list, create=True)
+        items[:0] = [_encode(value) for value in reversed(values)]
+        return len(items)
+
+    @_command
+    def rpush(self, name: str, *values) -> int:
+        items = self._get(name, list, create=True)
+        items.extend(_encode(value) for value in values)
+        return len(items)
+
+    @_command
+    def lrange(self, name: str, start: int, end: int) -> List[str]:
+        items = self._get(name, list) or []
+        return [items[i] for i in _span(len(items), start, end)]
+
+    @_command
+    def lindex(self, name: str, index: int) -> Optional[str]:
+        items = self._get(name, list) or []
+        return items[index] if -len(items) <= index < len(items) else None
+
+    @_command
+    def ltrim(self, name: str, start: int, end: int) -> bool:
+        items = self._get(name, list)
+        if items is not None:
+            kept = _span(len(items), start, end)
+            items[:] = items[kept.start:kept.stop] if kept else []
+            self._drop_if_empty(name, items)
+        return True
+
+    # -- sets -----------------------------------------------------------------
+
+    @_command
+    def sadd(self, name: str, *values) -> int:
+        members = self._get(name, set, create=True)
+        before = len(members)
+        members.update(_encode(value) for value in values)
+        return len(members) - before
+
+    @_command
+    def srem(self, name: str, *values) -> int:
+        members = self._get(name, set)
+        if members is None:
+            return 0
+        before = len(members)
+        members.difference_update(_encode(value) for value in values)
+        self._drop_if_empty(name, members)
+        return before - len(members)
+
+    @_command
+    def smembers(self, name: str) -> Set[str]:
+        return set(self._get(name, set) or ())
+
+    # -- sorted sets ----------------------------------------------------------
+
+    def _ordered(self, name: str, desc: bool = False) -> List[Tuple[str, float]]:
+        zset = self._get(name, _SortedSet) or {}
+        return sorted(zset.items(), key=lambda item: (item[1], item[0]), reverse=desc)
+
+    @_command
+    def zadd(self, name: str, mapping: Dict[str, float], nx: bool = False, xx: bool = False) -> int:
+        zset = self._get(name, _SortedSet, create=True)
+        added = 0
+        for member, score in mapping.items():
+            member = _encode(member)
+            exists = member in zset
+            if (nx and exists) or (xx and not exists):
+                continue
+            zset[member] = float(score)
+            added += not exists
+        self._drop_if_empty(name, zset)
+        return added
+
+    @_command
+    def zincrby(self, name: str, amount: float, value) -> float:
+        zset = self._get(name, _SortedSet, create=True)
+        member = _encode(value)
+        zset[member] = zset.get(member, 0.0) + float(amount)
+        return zset[member]
+
+    @_command
+    def zrem(self, name: str, *values) -> int:
+        zset = self._get(name, _SortedSet)
+        if zset is None:
+            return 0
+        removed = sum(1 for value in values if zset.pop(_encode(value), None) is not None)
+        self._drop_if_empty(name, zset)
+        return removed
+
+    @_command
+    def zscore(self, name: str, value) -> Optional[float]:
+        return (self._get(name, _SortedSet) or {}).get(_encode(value))
+
+    @_command
+    def zcard(self, name: str) -> int:
+        return len(self._get(name, _SortedSet) or ())
+
+    @_command
+    def zrevrank(self, name: str, value) -> Optional[int]:
+        member = _encode(value)
+        return next((rank for rank, (m, _) in enumerate(self._ordered(name, desc=True)) if m == member), None)
+
+    def _range(self, name: str, start: int, end: int, desc: bool, withscores: bool) -> list:
+        ordered = self._ordered(name, desc)
+        picked = [ordered[i] for i in _span(len(ordered), start, end)]
+        return picked if withscores else [member for member, _ in picked]
+
+    @_command
+    def zrange(self, name: str, start: int, end: int, desc: bool = False, withscores: bool = False) -> list:
+        return self._range(name, start, end, desc, withscores)
+
+    @_command
+    def zrevrange(self, name: str, start: int, end: int, withscores: bool = False) -> list:
+        return self._range(name, start, end, True, withscores)
+
+    @_command
+    def zrangebyscore(self, name: str, min, max, start: int = None, num: int = None, withscores: bool = False) -> list:
+        (low, low_open), (high, high_open) = _score_bound(min), _score_bound(max)
+        picked = [
+            (member, score) for member, score in self._ordered(name)
+            if (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+        ]
+        if start is not None and num is not None:
+            picked = picked[start:] if num < 0 else picked[start:start + num]
+        return picked if withscores else [member for member, _ in picked]
+
+    # -- streams --------------------------------------------------------------
+
+    @_command
+    def xadd(self, name: str, fields: Dict[str, Any], id: str = "*", maxlen: int = None, approximate: bool = True) -> str:
+        stream = self._get(name, _Stream, create=True)
+        if id == "*":
+            entry_id = max((int(time.time() * 1000), 0), (stream.last_id[0], stream.last_id[1] + 1))
+        else:
+            entry_id = _stream_id(id)
+            if entry_id <= stream.last_id:
+                raise ValueError("The ID specified in XADD is equal or smaller than the target stream top item")
+        stream.last_id = entry_id
+        stream.append((entry_id, {_encode(key): _encode(value) for key, value in fields.items()}))
+        if maxlen is not None and len(stream) > int(maxlen):
+            del stream[:len(stream) - int(maxlen)]
+        self._stream_added.notify_all()
+        return f"{entry_id[0]}-{entry_id[1]}"
+
+    @staticmethod
+    def _entries(entries) -> List[Tuple[str, Dict[str, str]]]:
+        return [(f"{ms}-{seq}", dict(fields)) for (ms, seq), fields in entries]
+
+    @_command
+    def xrevrange(self, name: str, max: str = "+", min: str = "-", count: int = None) -> List[Tuple[str, Dict[str, str]]]:
+        stream = self._get(name, _Stream) or []
+        high = None if max == "+" else _stream_id(max)
+        low = None if min == "-" else _stream_id(min)
+        picked = [
+            entry for entry in reversed(stream)
+            if (high is None or entry[0] <= high) and (low is None or entry[0] >= low)
+        ]
+        return self._entries(picked[:count] if count is not None else picked)
+
+    @_command
+    def xread(self, streams: Dict[str, str], count: int = None, block: int = None) -> list:
+        """Entries after each stream's id; with `block` (ms, 0 = forever) wait for one to be added."""
+        after = {}
+        for name, last_id in streams.items():
+            stream = self._get(name, _Stream)
+            after[name] = (stream.last_id if stream is not None else (0, 0)) if last_id == "$" else _stream_id(last_id)
+        deadline = None if not block else time.monotonic() + block / 1000
+        while True:
+            found = []
+            for name, last_id in after.items():
+                entries = [entry for entry in self._get(name, _Stream) or () if entry[0] > last_id][:count]
+                if entries:
+                    found.append([name, self._entries(entries)])
+            if found or block is None:
+                return found
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            self._stream_added.wait(remaining)
+
+    # -- scripts, pipelines and introspection --------------------------------
+
+    def register_script(self, source: str) -> MemoryScript:
+        return MemoryScript(self, source)
+
+    @_command
+    def evalsha(self, source: str, keys: List[str], args: List[str]):
+        return SCRIPTS[source](self, keys, args)
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    @_command
+    def info(self, section: str = None) -> Dict[str, Any]:
+        """Only the commandstats section, shaped like redis-py's parsed INFO commandstats."""
+        return {f"cmdstat_{name}": {"calls": calls} for name, calls in self.command_counts.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Counterpart of redis_pool.MeteredConnectionPool.stats: there are no connections, only commands."""
+        with self._lock:
+            return {"backend": "memory", "keys": len(self._data), "commands": sum(self.command_counts.values())}
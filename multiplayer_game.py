@@ -1,141 +1,466 @@
 import json
 import uuid
 import time
-from typing import Dict, Any, List
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
 import session
+import country_index
+import memory_store
+import rounds
 import streamlit as st
 
 # Redis key patterns
 GAME_KEY = "game:{game_id}"
-GAME_PLAYERS = "game:{game_id}:players"
+GAME_PLAYERS = "game:{game_id}:players"  # hash of uid -> display name
+GAME_SCORES = "game:{game_id}:scores"  # sorted set of uid -> score
 GAME_STATE = "game:{game_id}:state"
-GAME_ROUND = "game:{game_id}:round"
+GAME_ROUND = "game:{game_id}:round"  # index of the revealed round in the deck
+GAME_DECK = "game:{game_id}:deck"  # list of every round of the game, published once
 GAME_ANSWERS = "game:{game_id}:answers"
+GAME_EVENTS = "game:{game_id}:events"  # stream of round/answer/lobby events for listeners
+LOBBY_INDEX = "lobbies:{game_mode}"  # sorted set of open game ids, scored by created_at
+HOST_GAMES = "user:{uid}:games"  # set of game ids hosted by a user
 RECENT_EVENTS = "recent_events"
+GAME_EVENTS_MAXLEN = 200  # approximate cap on events kept per game
+GAME_EVENTS_TTL = 300  # seconds a finished game's event stream is kept for late listeners
+LEADERBOARD_SIZE = 10  # players shown in the in-game leaderboard
+ROUND_SECONDS = 30  # default time limit of a multiplayer round
+SNAPSHOT_STATE_KEY = "game_snapshot"  # session_state slot for the current rerun's load_game view
+DECK_STATE_KEY = "deck"  # session_state slot for the key of the current game's shared deck
+DECK_CACHE_SIZE = 64  # decks kept per process, shared by every session playing them
+LOBBY_REFRESH_INTERVAL = 3  # seconds between background reloads of a game mode's lobby list
+GAME_WATCH_BLOCK = 2  # seconds per blocking read of a watched game's stream; under REDIS_LONG_POLL_SOCKET_TIMEOUT
+GAME_WATCH_IDLE = 30  # seconds a game's stream reader keeps running after the last session waited on it
+
+# Scores a round server-side and announces it with a round_scored event: KEYS = answers hash,
+# scores zset, events stream; ARGV = normalized correct answer, host uid, stream maxlen.
+# Answers are normalized on submit, so a plain comparison is enough. Only uids already on the
+# scoreboard are awarded, and ZINCRBY updates scores in place so concurrent joins are never lost.
+AWARD_SCORES_SCRIPT = """
+local answers = redis.call('HGETALL', KEYS[1])
+for i = 1, #answers, 2 do
+    if answers[i + 1] == ARGV[1] and redis.call('ZSCORE', KEYS[2], answers[i]) then
+        redis.call('ZINCRBY', KEYS[2], 1, answers[i])
+    end
+end
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[3], '*', 'event', 'round_scored', 'uid', ARGV[2])
+return redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+"""
+
+# Records an answer and closes the round once every player has answered, atomically so exactly
+# one submission sees the last slot filled. Only the close goes on the event stream, so clients
+# blocked on it wake once per round rather than once per answer. Answers arriving after the
+# round's deadline (by the server's clock) are rejected. KEYS = answers hash, players hash,
+# events stream, game hash; ARGV = uid, normalized answer, stream maxlen.
+# Returns {answers, players}, or nil when too late.
+SUBMIT_ANSWER_SCRIPT = """
+local deadline = tonumber(redis.call('HGET', KEYS[4], 'round_deadline'))
+if deadline then
+    local now = redis.call('TIME')
+    if tonumber(now[1]) + tonumber(now[2]) / 1000000 > deadline then
+        return false
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local submitted = redis.call('HLEN', KEYS[1])
+local expected = redis.call('HLEN', KEYS[2])
+if submitted >= expected then
+    redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[3], '*', 'event', 'round_closed', 'uid', ARGV[1])
+end
+return {submitted, expected}
+"""
+
+# What the scripts above do, for the in-process store used with ENV=memory (see memory_store.script)
+@memory_store.script(AWARD_SCORES_SCRIPT)
+def _award_scores_in_memory(store, keys, args):
+    correct, host, maxlen = args
+    for uid, answer in store.hgetall(keys[0]).items():
+        if answer == correct and store.zscore(keys[1], uid) is not None:
+            store.zincrby(keys[1], 1, uid)
+    store.xadd(keys[2], {"event": "round_scored", "uid": host}, maxlen=int(maxlen))
+    return [str(value) for entry in store.zrange(keys[1], 0, -1, withscores=True) for value in entry]
+
+@memory_store.script(SUBMIT_ANSWER_SCRIPT)
+def _submit_answer_in_memory(store, keys, args):
+    uid, answer, maxlen = args
+    deadline = store.hget(keys[3], "round_deadline")
+    seconds, microseconds = store.time()
+    if deadline is not None and seconds + microseconds / 1e6 > float(deadline):
+        return None
+    store.hset(keys[0], uid, answer)
+    submitted, expected = store.hlen(keys[0]), store.hlen(keys[1])
+    if submitted >= expected:
+        store.xadd(keys[2], {"event": "round_closed", "uid": uid}, maxlen=int(maxlen))
+    return [submitted, expected]
+
+def _add_game_event(pipe, game_id: str, event: str, uid: str = None) -> None:
+    """Queue an event on the game's stream; `uid` defaults to the caller."""
+    if uid is None:
+        uid = st.session_state.get("uid", "")
+    pipe.xadd(GAME_EVENTS.format(game_id=game_id), {"event": event, "uid": uid}, maxlen=GAME_EVENTS_MAXLEN, approximate=True)
+
+def read_game_events(game_id: str, after_id: str, block_ms: int = None, r=None) -> List[Dict[str, str]]:
+    """Events on the game's stream after `after_id`, waiting up to `block_ms` when given."""
+    if r is None:
+        r = session.get_redis_connection()
+    streams = r.xread({GAME_EVENTS.format(game_id=game_id): after_id}, count=GAME_EVENTS_MAXLEN, block=block_ms)
+    if not streams:
+        return []
+    return [dict(fields, id=event_id) for event_id, fields in streams[0][1]]
+
+def _stream_id(event_id: str) -> Tuple[int, int]:
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+@st.cache_resource
+def _game_watchers() -> Tuple[Dict[str, Dict[str, Any]], threading.Lock]:
+    return {}, threading.Lock()
+
+def wait_for_game_events(game_id: str, after_id: str, timeout: float) -> List[Dict[str, str]]:
+    """Events after `after_id`, waiting up to `timeout` seconds on the game's shared reader."""
+    watchers, lock = _game_watchers()
+    with lock:
+        watcher = watchers.get(game_id)
+        if watcher is None:
+            watcher = watchers[game_id] = {"events": [], "start_id": after_id, "healthy": True, "changed": threading.Condition()}
+            # one blocking read per game, not per waiting player, so long-poll connections grow with games
+            threading.Thread(target=_watch_game, args=(session.get_long_poll_connection(), game_id, watchers, lock), daemon=True).start()
+        watcher["used_at"] = time.monotonic()
+    cursor = _stream_id(after_id)
+    def after():
+        return [event for event in watcher["events"] if _stream_id(event["id"]) > cursor]
+    with watcher["changed"]:
+        # the reader has not buffered this far back, or cannot reach Redis: read without waiting
+        if not watcher["healthy"] or cursor < _stream_id(watcher["start_id"]):
+            return read_game_events(game_id, after_id)
+        watcher["changed"].wait_for(after, timeout)
+        return after()
+
+def _watch_game(r, game_id: str, watchers: Dict[str, Dict[str, Any]], lock: threading.Lock) -> None:
+    from redis.exceptions import RedisError
+
+    watcher = watchers[game_id]
+    cursor = watcher["start_id"]
+    while True:
+        with lock:
+            if time.monotonic() - watcher["used_at"] >= GAME_WATCH_IDLE:
+                del watchers[game_id]
+                return
+        try:
+            events = read_game_events(game_id, cursor, GAME_WATCH_BLOCK * 1000, r)
+        except RedisError:  # e.g. every long-poll connection is busy with other games
+            with watcher["changed"]:
+                watcher["healthy"] = False
+            time.sleep(GAME_WATCH_BLOCK)
+            continue
+        with watcher["changed"]:
+            watcher["healthy"] = True
+            if events:
+                cursor = events[-1]["id"]
+                buffered = watcher["events"] + events
+                if len(buffered) > GAME_EVENTS_MAXLEN:
+                    watcher["start_id"] = buffered[-GAME_EVENTS_MAXLEN - 1]["id"]
+                    buffered = buffered[-GAME_EVENTS_MAXLEN:]
+                watcher["events"] = buffered
+                watcher["changed"].notify_all()
 
 def create_game(host_uid: str, host_name: str, options: Dict[str, Any]) -> str:
     """Host creates a lobby and becomes initial player."""
     r = session.get_redis_connection()
     game_id = str(uuid.uuid4())[:8]
-    r.hset(GAME_KEY.format(game_id=game_id), mapping={
+    game_mode = st.session_state.current_game
+    created_at = int(time.time())
+    pipe = r.pipeline()
+    pipe.hset(GAME_KEY.format(game_id=game_id), mapping={
         "host": host_uid,
-        "game_mode": st.session_state.current_game,
+        "host_name": host_name,
+        "game_mode": game_mode,
         "status": "lobby",
         "options": json.dumps(options),
-        "created_at": int(time.time())
+        "created_at": created_at
     })
-    # add host to players hash
-    r.hset(GAME_PLAYERS.format(game_id=game_id), host_uid, json.dumps({
-        "name": host_name, "score": 0
-    }))
-    st.session_state.auto_refresh = True
-    session.push_event({"event": "game_created", "game_mode": st.session_state.current_game, "game_id": game_id, "host_uid": host_uid, "host_name": host_name})
+    # add host to players hash and scoreboard
+    pipe.hset(GAME_PLAYERS.format(game_id=game_id), host_uid, host_name)
+    pipe.zadd(GAME_SCORES.format(game_id=game_id), {host_uid: 0})
+    pipe.zadd(LOBBY_INDEX.format(game_mode=game_mode), {game_id: created_at})
+    pipe.sadd(HOST_GAMES.format(uid=host_uid), game_id)
+    pipe.execute()
+    invalidate_snapshot()
+    expire_lobby_list(game_mode)
+    session.push_event({"event": "game_created", "game_mode": game_mode, "game_id": game_id, "host_uid": host_uid, "host_name": host_name})
     return game_id
 
-def list_lobbies() -> List[Dict[str, Any]]:
-    """Return list of active lobbies in 'lobby' status."""
-    r = session.get_redis_connection()
-    keys = r.keys("game:*")
+def list_lobbies(game_mode: str, r=None) -> List[Dict[str, Any]]:
+    """Return open lobbies for a game mode from the lobby index."""
+    if r is None:
+        r = session.get_redis_connection()
+    index_key = LOBBY_INDEX.format(game_mode=game_mode)
+    game_ids = r.zrange(index_key, 0, -1)
+    if not game_ids:
+        return []
+    pipe = r.pipeline(transaction=False)
+    for game_id in game_ids:
+        pipe.hmget(GAME_KEY.format(game_id=game_id), "status", "host_name", "options")
     lobbies = []
-    seen = set()
-    for k in keys:
-        if ":" not in k.split("game:")[-1]:
-            pass
-    for key in r.keys("game:*"):
-        if key.count(":") != 1:
-            continue
-        game_id = key.split(":")[1]
-        if game_id in seen:
-            continue
-        seen.add(game_id)
-        status = r.hget(key, "status")
+    stale = []
+    for game_id, (status, host_name, options) in zip(game_ids, pipe.execute()):
         if status == "lobby" or status == "in_progress":
-            options = json.loads(r.hget(key, "options") or "{}")
-            game_mode = r.hget(key, "game_mode")
-            host_uid = r.hget(key, "host")
-            host_name = None
-            if host_uid:
-                p = r.hget(GAME_PLAYERS.format(game_id=game_id), host_uid)
-                if p:
-                    host_name = json.loads(p).get("name")
-            lobbies.append({"game_id": game_id, "game_mode": game_mode, "host_name": host_name, "options": options})
+            lobbies.append({"game_id": game_id, "game_mode": game_mode, "host_name": host_name, "options": json.loads(options or "{}")})
+        else:
+            # game hash was removed or the game finished without leaving the index
+            stale.append(game_id)
+    if stale:
+        r.zrem(index_key, *stale)
     return lobbies
 
+@st.cache_resource
+def _lobby_lists() -> Tuple[Dict[str, Dict[str, Any]], threading.Lock]:
+    return {}, threading.Lock()
+
+def cached_lobbies(game_mode: str) -> Dict[str, Any]:
+    """This process's lobby list for a game mode, refreshed in the background."""
+    lists, lock = _lobby_lists()
+    with lock:
+        entry = lists.setdefault(game_mode, {"lobbies": None, "error": False, "refreshed_at": float("-inf"), "refreshing": False})
+        if not entry["refreshing"] and time.monotonic() - entry["refreshed_at"] >= LOBBY_REFRESH_INTERVAL:
+            entry["refreshing"] = True
+            # the client is looked up here, since the refresh thread runs outside the script
+            threading.Thread(target=_refresh_lobbies, args=(session.get_redis_connection(), game_mode, entry, lock), daemon=True).start()
+        return {"lobbies": entry["lobbies"], "error": entry["error"]}
+
+def expire_lobby_list(game_mode: str) -> None:
+    """Reload a game mode's lobby list on its next read."""
+    lists, lock = _lobby_lists()
+    with lock:
+        if game_mode in lists:
+            lists[game_mode]["refreshed_at"] = float("-inf")
+
+def _refresh_lobbies(r, game_mode: str, entry: Dict[str, Any], lock: threading.Lock) -> None:
+    from redis.exceptions import RedisError
+
+    lobbies, error = entry["lobbies"], True
+    try:
+        lobbies, error = list_lobbies(game_mode, r), False
+    except RedisError:
+        pass  # keep showing the last list, with a warning
+    finally:
+        with lock:
+            entry.update(lobbies=lobbies, error=error, refreshed_at=time.monotonic(), refreshing=False)
+
 def join_game(game_id: str, uid: str, name: str) -> None:
     r = session.get_redis_connection()
-    r.hset(GAME_PLAYERS.format(game_id=game_id), uid, json.dumps({"name": name, "score": 0}))
+    pipe = r.pipeline()
+    pipe.hset(GAME_PLAYERS.format(game_id=game_id), uid, name)
+    pipe.zadd(GAME_SCORES.format(game_id=game_id), {uid: 0}, nx=True)
+    _add_game_event(pipe, game_id, "player_joined", uid)
+    pipe.execute()
+    invalidate_snapshot()
     session.push_event({"event": "player_joined_lobby", "game_id": game_id, "uid": uid, "name": name})
-    st.session_state.auto_refresh = True
 
-def start_game(game_id: str, host_uid: str, initial_pool: list, num_options:int, num_rounds:int) -> None:
+def start_game(game_id: str, host_uid: str, initial_pool: List[int], num_options:int, num_rounds:int) -> None:
+    """Move the game to 'in_progress'; it stays listed so players can join mid-game."""
     r = session.get_redis_connection()
     key = GAME_KEY.format(game_id=game_id)
     current_host = r.hget(key, "host")
     if current_host != host_uid:
         raise PermissionError("Only host can start the game")
-    r.hset(key, "status", "in_progress")
     state = {
-        "pool": json.dumps(initial_pool),
+        "pool": initial_pool,
         "num_options": num_options,
         "num_rounds": num_rounds,
         "round_index": 0,
         "started_at": int(time.time())
     }
-    r.set(GAME_STATE.format(game_id=game_id), json.dumps(state))
+    pipe = r.pipeline()
+    pipe.hset(key, "status", "in_progress")
+    pipe.hdel(key, "round_deadline")
+    pipe.set(GAME_STATE.format(game_id=game_id), json.dumps(state))
     # clear any previous round/answers
-    r.delete(GAME_ROUND.format(game_id=game_id))
-    r.delete(GAME_ANSWERS.format(game_id=game_id))
+    pipe.delete(GAME_ROUND.format(game_id=game_id), GAME_DECK.format(game_id=game_id), GAME_ANSWERS.format(game_id=game_id))
+    _add_game_event(pipe, game_id, "game_started", host_uid)
+    pipe.execute()
+    invalidate_snapshot()
     session.push_event({"event": "game_started", "game_id": game_id})
 
-def publish_round(game_id: str, round_data: dict) -> None:
+def _pack_round(round_data: dict) -> str:
+    # only the answer's country id is sent; readers rehydrate it from country_index
+    return json.dumps({**round_data, "answer": round_data["answer"]["id"]})
+
+def _unpack_round(raw: str) -> Dict[str, Any]:
+    round_data = json.loads(raw)
+    round_data["answer"] = country_index.get_country(round_data["answer"])
+    return round_data
+
+def publish_deck(game_id: str, deck: List[dict], spec: Dict[str, Any]) -> None:
+    """Publish every round of the game once, with the spec and seed it was built from."""
     r = session.get_redis_connection()
-    r.set(GAME_ROUND.format(game_id=game_id), json.dumps(round_data))
-    # clear previous answers for this round
-    r.delete(GAME_ANSWERS.format(game_id=game_id))
+    deck_key = GAME_DECK.format(game_id=game_id)
+    pipe = r.pipeline()
+    pipe.delete(deck_key)
+    if deck:
+        pipe.rpush(deck_key, *[_pack_round(round_data) for round_data in deck])
+    pipe.hset(GAME_KEY.format(game_id=game_id), "deck_spec", json.dumps(spec))
+    pipe.execute()
+    invalidate_snapshot()
+
+def get_deck(game_id: str) -> List[Dict[str, Any]]:
+    r = session.get_redis_connection()
+    return [_unpack_round(raw) for raw in r.lrange(GAME_DECK.format(game_id=game_id), 0, -1)]
+
+@st.cache_resource(ttl=600)
+def _server_clock_offset() -> float:
+    seconds, microseconds = session.get_redis_connection().time()
+    return seconds + microseconds / 1e6 - time.time()
+
+def server_time() -> float:
+    """Redis server time, from a per-process clock offset."""
+    return time.time() + _server_clock_offset()
 
-def submit_answer(game_id: str, uid: str, answer_value: str) -> None:
+def seconds_left(view: Dict[str, Any]) -> float:
+    """Time left in the revealed round of a load_game view, or None without a deadline."""
+    if view["round_deadline"] is None:
+        return None
+    return view["round_deadline"] - server_time()
+
+def publish_round(game_id: str, round_index: int, time_limit: int = ROUND_SECONDS, starts_in: float = 0) -> None:
+    """Reveal a round with its deadline and clear the previous answers."""
     r = session.get_redis_connection()
-    r.hset(GAME_ANSWERS.format(game_id=game_id), uid, answer_value)
+    pipe = r.pipeline()
+    pipe.set(GAME_ROUND.format(game_id=game_id), round_index)
+    pipe.hset(GAME_KEY.format(game_id=game_id), "round_deadline", server_time() + starts_in + time_limit)
+    pipe.delete(GAME_ANSWERS.format(game_id=game_id))
+    _add_game_event(pipe, game_id, "round_published")
+    pipe.execute()
+    invalidate_snapshot()
 
-def collect_answers(game_id: str) -> Dict[str, str]:
+def submit_answer(game_id: str, uid: str, answer_value: str) -> bool:
+    """Record a player's answer; returns whether it closed the round, raises TimeoutError if too late."""
     r = session.get_redis_connection()
-    return r.hgetall(GAME_ANSWERS.format(game_id=game_id))
+    submit = r.register_script(SUBMIT_ANSWER_SCRIPT)
+    result = submit(
+        keys=[GAME_ANSWERS.format(game_id=game_id), GAME_PLAYERS.format(game_id=game_id), GAME_EVENTS.format(game_id=game_id), GAME_KEY.format(game_id=game_id)],
+        args=[uid, country_index.normalize_answer(answer_value), GAME_EVENTS_MAXLEN],
+    )
+    invalidate_snapshot()
+    if result is None:
+        raise TimeoutError("The round's time is up")
+    submitted, expected = result
+    return submitted >= expected
 
 def award_scores(game_id: str, correct_answer: str) -> Dict[str,int]:
-    """Host checks answers, updates player scores in players hash and returns updated scores dict."""
+    """Host scores the round atomically in Redis and gets back every player's updated score."""
     r = session.get_redis_connection()
-    answers = collect_answers(game_id)
-    players = r.hgetall(GAME_PLAYERS.format(game_id=game_id))
-    updated = {}
-    for uid, pdata in players.items():
-        p = json.loads(pdata)
-        submitted = answers.get(uid)
-        if submitted and submitted.strip().lower() == correct_answer.strip().lower():
-            p["score"] = p.get("score", 0) + 1
-            updated[uid] = p["score"]
-        else:
-            updated[uid] = p.get("score", 0)
-        r.hset(GAME_PLAYERS.format(game_id=game_id), uid, json.dumps(p))
+    award = r.register_script(AWARD_SCORES_SCRIPT)
+    flat = award(
+        keys=[GAME_ANSWERS.format(game_id=game_id), GAME_SCORES.format(game_id=game_id), GAME_EVENTS.format(game_id=game_id)],
+        args=[country_index.normalize_answer(correct_answer), st.session_state.get("uid", ""), GAME_EVENTS_MAXLEN],
+    )
+    updated = {uid: int(float(score)) for uid, score in zip(flat[::2], flat[1::2])}
+    invalidate_snapshot()
     session.push_event({"event": "round_scored", "game_id": game_id, "correct": correct_answer})
     return updated
 
-def advance_round(game_id: str) -> Dict[str, Any]:
-    """Advance round_index and return new state (or None if finished). Host should call generate_round locally
-       and use publish_round to send the round_data."""
+def load_game(game_id: str, deck: Tuple[dict, ...] = None) -> Dict[str, Any]:
+    """Fetch everything a page render needs about a game in one pipelined round trip."""
     r = session.get_redis_connection()
-    state_raw = r.get(GAME_STATE.format(game_id=game_id))
-    if not state_raw:
+    pipe = r.pipeline(transaction=False)
+    pipe.hmget(GAME_KEY.format(game_id=game_id), "host", "status", "game_mode", "options", "round_deadline")
+    pipe.get(GAME_ROUND.format(game_id=game_id))
+    pipe.hlen(GAME_ANSWERS.format(game_id=game_id))
+    pipe.hgetall(GAME_PLAYERS.format(game_id=game_id))
+    pipe.xrevrange(GAME_EVENTS.format(game_id=game_id), count=1)
+    (host, status, game_mode, options, round_deadline), round_index, answer_count, players, last_event = pipe.execute()
+    options = json.loads(options) if options else {}
+    round_data = None
+    if round_index is not None:
+        round_index = int(round_index)
+        if deck is None:
+            raw = r.lindex(GAME_DECK.format(game_id=game_id), round_index)
+            round_data = _unpack_round(raw) if raw else None
+        elif round_index < len(deck):
+            round_data = deck[round_index]
+    return {
+        "game_id": game_id,
+        "host": host,
+        "status": status,
+        "game_mode": game_mode,
+        "options": options,
+        "round_index": round_index,
+        "round": round_data,
+        # server time (see server_time) at which the revealed round closes
+        "round_deadline": float(round_deadline) if round_deadline and round_index is not None else None,
+        "answer_count": answer_count,
+        "players": players,
+        # stream position this view reflects; listeners wait for events after it
+        "last_event_id": last_event[0][0] if last_event else "0-0",
+    }
+
+@st.cache_resource
+def _shared_decks() -> Tuple["OrderedDict[tuple, tuple]", threading.Lock]:
+    return OrderedDict(), threading.Lock()
+
+def deck_key(pool: Tuple[int, ...], spec: Dict[str, Any]) -> tuple:
+    """Key of the deck rounds.build_deck(pool, **spec) builds."""
+    return ("spec", tuple(pool), tuple(sorted(spec.items())))
+
+def _load_deck(key: tuple) -> Tuple[Dict[str, Any], ...]:
+    """The shared deck for `key`, rebuilt if it is not in the process cache."""
+    decks, lock = _shared_decks()
+    with lock:
+        deck = decks.get(key)
+        if deck is not None:
+            decks.move_to_end(key)
+            return deck
+    if key[0] == "game":
+        deck = tuple(get_deck(key[1]))
+    else:
+        _, pool, spec = key
+        deck = tuple(rounds.build_deck(pool, **dict(spec)))
+    with lock:
+        deck = decks.setdefault(key, deck)
+        while len(decks) > DECK_CACHE_SIZE:
+            decks.popitem(last=False)
+    return deck
+
+def get_cached_deck(game_id: str) -> Tuple[Dict[str, Any], ...]:
+    """This session's deck for the game, or None if not built or fetched yet."""
+    cached = st.session_state.get(DECK_STATE_KEY)
+    if cached is None or cached["game_id"] != game_id:
         return None
-    state = json.loads(state_raw)
-    state["round_index"] += 1
-    r.set(GAME_STATE.format(game_id=game_id), json.dumps(state))
-    return state
+    return _load_deck(cached["key"])
+
+def cache_deck(game_id: str, key: tuple) -> Tuple[Dict[str, Any], ...]:
+    """Make the deck for `key` this session's deck for the game."""
+    st.session_state[DECK_STATE_KEY] = {"game_id": game_id, "key": key}
+    return _load_deck(key)
+
+def clear_cached_deck() -> None:
+    st.session_state.pop(DECK_STATE_KEY, None)
+
+def get_snapshot(game_id: str) -> Dict[str, Any]:
+    """The load_game view for this rerun, loaded from Redis on first use."""
+    if not game_id:
+        # single-player games have no Redis state
+        return {"game_id": "", "host": None, "status": None, "game_mode": None, "options": {}, "round_index": None,
+                "round": None, "round_deadline": None, "answer_count": 0, "players": {}, "last_event_id": "0-0"}
+    snapshot = st.session_state.get(SNAPSHOT_STATE_KEY)
+    if snapshot is None or snapshot["game_id"] != game_id:
+        deck = get_cached_deck(game_id)
+        snapshot = load_game(game_id, deck)
+        if deck is None and snapshot["round_index"] is not None:
+            cache_deck(game_id, ("game", game_id))
+        st.session_state[SNAPSHOT_STATE_KEY] = snapshot
+    return snapshot
+
+def invalidate_snapshot() -> None:
+    st.session_state.pop(SNAPSHOT_STATE_KEY, None)
 
 def lobby_screen(game_id: str):
-    r = session.get_redis_connection()
-    current_host = get_game_host_uid(game_id)
-    players = r.hgetall(GAME_PLAYERS.format(game_id=game_id))
-    if r.hget(GAME_KEY.format(game_id=game_id), "status") == "lobby":
+    view = get_snapshot(game_id)
+    current_host = view["host"]
+    players = view["players"]
+    if view["status"] == "lobby":
         st.markdown("""
         <div style="
             background: linear-gradient(135deg, #FFFFFF 0%, #FCE4EC 50%, #FFFFFF 100%);
@@ -148,8 +473,7 @@ def lobby_screen(game_id: str):
             <h2 style="color: #C2185B !important; text-align: center; margin-bottom: 2rem !important; font-size: 2.2rem !important; font-weight: 700 !important; text-shadow: 1px 1px 2px rgba(255,255,255,0.8);">🎮 Players in Lobby</h2>
         """, unsafe_allow_html=True)
 
-        for uid, pdata in players.items():
-            p = json.loads(pdata)
+        for uid, name in players.items():
             is_host = "👑 " if uid == current_host else ""
             st.markdown(f"""
             <div style="
@@ -164,16 +488,15 @@ def lobby_screen(game_id: str):
                 font-size: 1.1rem;
                 text-shadow: 1px 1px 2px rgba(255,255,255,0.8);
             ">
-                {is_host}{p['name']}
+                {is_host}{name}
             </div>
             """, unsafe_allow_html=True)
 
         st.markdown("</div>", unsafe_allow_html=True)
         if current_host == st.session_state.uid:
             if st.button("Start Game"):
-                options_raw = r.hget(GAME_KEY.format(game_id=game_id), "options")
-                options = json.loads(options_raw)
-                initial_pool = options.get("initial_pool", [])
+                options = view["options"]
+                initial_pool = list(st.session_state.get("pool", ()))
                 num_options = options.get("num_options", 4)
                 num_rounds = options.get("num_rounds", 5)
                 start_game(game_id, st.session_state.uid, initial_pool, num_options, num_rounds)
@@ -199,54 +522,96 @@ def lobby_screen(game_id: str):
             """, unsafe_allow_html=True)
 
 def get_game_host_uid(game_id: str) -> str:
-    r = session.get_redis_connection()
-    key = GAME_KEY.format(game_id=game_id)
-    return r.hget(key, "host")
+    return get_snapshot(game_id)["host"]
 
 def pull_question_data(game_id: str) -> Dict[str, Any]:
-    r = session.get_redis_connection()
-    round_raw = r.get(GAME_ROUND.format(game_id=game_id))
-    if not round_raw:
-        return None
-    return json.loads(round_raw)
+    return get_snapshot(game_id)["round"]
 
 def get_game_status(game_id: str) -> str:
-    r = session.get_redis_connection()
-    key = GAME_KEY.format(game_id=game_id)
-    return r.hget(key, "status")
+    return get_snapshot(game_id)["status"]
 
 def get_game_options(game_id: str) -> Dict[str, Any]:
-    r = session.get_redis_connection()
-    return json.loads(r.hget(GAME_KEY.format(game_id=game_id), "options"))
-
-def check_all_answers_submitted(game_id: str) -> bool:
-    r = session.get_redis_connection()
-    answers = collect_answers(game_id)
-    players = r.hgetall(GAME_PLAYERS.format(game_id=game_id))
-    return len(answers) == len(players)
+    return get_snapshot(game_id)["options"]
 
 def end_game(game_id: str) -> None:
     r = session.get_redis_connection()
-    r.hset(GAME_KEY.format(game_id=game_id), "status", "finished")
-    r.delete(GAME_PLAYERS.format(game_id=game_id))
-    r.delete(GAME_ROUND.format(game_id=game_id))
-    r.delete(GAME_ANSWERS.format(game_id=game_id))
-    r.delete(GAME_STATE.format(game_id=game_id))
+    key = GAME_KEY.format(game_id=game_id)
+    game_mode, host = r.hmget(key, "game_mode", "host")
+    pipe = r.pipeline()
+    if host:
+        pipe.srem(HOST_GAMES.format(uid=host), game_id)
+    pipe.hset(key, "status", "finished")
+    if game_mode:
+        pipe.zrem(LOBBY_INDEX.format(game_mode=game_mode), game_id)
+    pipe.delete(
+        GAME_PLAYERS.format(game_id=game_id),
+        GAME_SCORES.format(game_id=game_id),
+        GAME_ROUND.format(game_id=game_id),
+        GAME_DECK.format(game_id=game_id),
+        GAME_ANSWERS.format(game_id=game_id),
+        GAME_STATE.format(game_id=game_id),
+    )
+    _add_game_event(pipe, game_id, "game_ended")
+    pipe.expire(GAME_EVENTS.format(game_id=game_id), GAME_EVENTS_TTL)
+    pipe.execute()
+    invalidate_snapshot()
+    if game_mode:
+        expire_lobby_list(game_mode)
     session.push_event({"event": "game_ended", "game_id": game_id})
     st.session_state.game_started = False
 
-def get_leaderboard(game_id: str) -> List[Dict[str, Any]]:
-    """Get sorted leaderboard of players with their scores."""
+def delete_game(game_id: str) -> None:
+    """Remove every key of a game and drop it from the lobby index."""
     r = session.get_redis_connection()
-    players = r.hgetall(GAME_PLAYERS.format(game_id=game_id))
-    leaderboard = []
-    for uid, pdata in players.items():
-        p = json.loads(pdata)
-        leaderboard.append({
-            "name": p["name"],
-            "score": p.get("score", 0),
-            "uid": uid
-        })
-    # Sort by score descending
-    leaderboard.sort(key=lambda x: x["score"], reverse=True)
+    key = GAME_KEY.format(game_id=game_id)
+    game_mode, host = r.hmget(key, "game_mode", "host")
+    pipe = r.pipeline()
+    if host:
+        pipe.srem(HOST_GAMES.format(uid=host), game_id)
+    if game_mode:
+        pipe.zrem(LOBBY_INDEX.format(game_mode=game_mode), game_id)
+    pipe.delete(
+        key,
+        GAME_PLAYERS.format(game_id=game_id),
+        GAME_SCORES.format(game_id=game_id),
+        GAME_ROUND.format(game_id=game_id),
+        GAME_DECK.format(game_id=game_id),
+        GAME_ANSWERS.format(game_id=game_id),
+        GAME_STATE.format(game_id=game_id),
+        GAME_EVENTS.format(game_id=game_id),
+    )
+    pipe.execute()
+    invalidate_snapshot()
+    if game_mode:
+        expire_lobby_list(game_mode)
+
+def get_leaderboard(game_id: str, uid: str = None, top_k: int = LEADERBOARD_SIZE) -> Dict[str, Any]:
+    """Top players by score plus the caller's own standing."""
+    r = session.get_redis_connection()
+    scores_key = GAME_SCORES.format(game_id=game_id)
+    pipe = r.pipeline(transaction=False)
+    pipe.zrevrange(scores_key, 0, top_k - 1, withscores=True)
+    pipe.zcard(scores_key)
+    if uid:
+        pipe.zrevrank(scores_key, uid)
+        pipe.zscore(scores_key, uid)
+        top, total, my_rank, my_score = pipe.execute()
+    else:
+        top, total = pipe.execute()
+        my_rank = my_score = None
+    uids = [member for member, _ in top]
+    if my_rank is not None:
+        uids.append(uid)
+    names = r.hmget(GAME_PLAYERS.format(game_id=game_id), uids) if uids else []
+
+    leaderboard = {
+        "top": [
+            {"uid": member, "name": name or "", "score": int(score), "rank": rank}
+            for rank, ((member, score), name) in enumerate(zip(top, names), start=1)
+        ],
+        "me": None,
+        "total": total,
+    }
+    if my_rank is not None:
+        leaderboard["me"] = {"uid": uid, "name": names[-1] or "", "score": int(my_score), "rank": my_rank + 1}
     return leaderboard
@@ -0,0 +1,98 @@
+"""Pooled Redis client factory with health checks, jittered retries and pool-usage metrics.
+
+Imported by session.get_redis_connection on first use, so single-player sessions never load redis.
+"""
+import threading
+import time
+from typing import Any, Dict, Mapping
+
+import redis
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
+
+# Defaults for the optional pool settings; any of them can be set in the same secrets section
+# as REDIS_HOST. Every script thread shares the pool. Blocking reads of the game event stream,
+# one reader per game however many of its players wait, go through a second pool (the
+# REDIS_LONG_POLL_* settings), so ordinary commands can keep a
+# short socket timeout: against a hung server one fails after about
+# REDIS_SOCKET_TIMEOUT * (REDIS_RETRIES + 1) seconds.
+POOL_DEFAULTS = {
+    "REDIS_MAX_CONNECTIONS": 64,
+    "REDIS_POOL_TIMEOUT": 2.0,  # seconds a thread waits for a free connection before failing
+    "REDIS_CONNECT_TIMEOUT": 1.0,
+    "REDIS_SOCKET_TIMEOUT": 1.0,
+    "REDIS_HEALTH_CHECK_INTERVAL": 30,  # seconds idle before a connection is PINGed on checkout
+    "REDIS_RETRIES": 2,
+    "REDIS_BACKOFF_BASE": 0.05,  # seconds; exponential with jitter, capped at REDIS_BACKOFF_CAP
+    "REDIS_BACKOFF_CAP": 0.5,
+    # games this process can have players waiting in at once; past it, the extra games poll
+    "REDIS_LONG_POLL_MAX_CONNECTIONS": 64,
+    "REDIS_LONG_POLL_SOCKET_TIMEOUT": 3.0,  # must exceed multiplayer_game.GAME_WATCH_BLOCK
+}
+
+class MeteredConnectionPool(redis.BlockingConnectionPool):
+    """BlockingConnectionPool that records checkouts, time spent waiting and peak usage."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.wait_seconds = 0.0
+        self.peak_in_use = 0
+
+    def in_use(self) -> int:
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        return len(self._connections) - idle
+
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:  # pool exhausted for REDIS_POOL_TIMEOUT, or the connect failed
+            with self._stats_lock:
+                self.failed_checkouts += 1
+            raise
+        in_use = self.in_use()
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds += time.perf_counter() - start
+            self.peak_in_use = max(self.peak_in_use, in_use)
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_connections": self.max_connections,
+                "created": len(self._connections),
+                "in_use": self.in_use(),
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "avg_wait_ms": self.wait_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+            }
+
+def create_client(cfg: Mapping[str, Any], long_poll: bool = False) -> redis.Redis:
+    """Build a client on a bounded, health-checked pool from a secrets section.
+
+    A long_poll client is for blocking reads: it has its own pool, the longer socket timeout and
+    no retries, so a hung server costs a waiting client a single timeout.
+    """
+    settings = {**POOL_DEFAULTS, **{key: cfg[key] for key in POOL_DEFAULTS if key in cfg}}
+    prefix = "REDIS_LONG_POLL_" if long_poll else "REDIS_"
+    pool = MeteredConnectionPool(
+        max_connections=int(settings[prefix + "MAX_CONNECTIONS"]),
+        timeout=float(settings["REDIS_POOL_TIMEOUT"]),
+        host=cfg["REDIS_HOST"],
+        port=int(cfg["REDIS_PORT"]),
+        password=cfg.get("REDIS_PASSWORD", "") or None,
+        decode_responses=True,
+        socket_connect_timeout=float(settings["REDIS_CONNECT_TIMEOUT"]),
+        socket_timeout=float(settings[prefix + "SOCKET_TIMEOUT"]),
+        health_check_interval=int(settings["REDIS_HEALTH_CHECK_INTERVAL"]),
+        retry=Retry(
+            ExponentialWithJitterBackoff(base=float(settings["REDIS_BACKOFF_BASE"]), cap=float(settings["REDIS_BACKOFF_CAP"])),
+            0 if long_poll else int(settings["REDIS_RETRIES"]),
+        ),
+    )
+    return redis.Redis(connection_pool=pool)
@@ -0,0 +1,107 @@
+import random
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import country_index
+
+class RoundPool:
+    """Country ids that can still be drawn as answers.
+
+    Ids live in a list plus an id -> position map, so drawing a random answer is a
+    swap-remove and membership checks are O(1); nothing is rebuilt between rounds.
+    """
+    __slots__ = ("ids", "positions")
+
+    def __init__(self, country_ids: Iterable[int]):
+        self.ids = list(dict.fromkeys(country_ids))
+        self.positions = {country_id: i for i, country_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, country_id: int) -> bool:
+        return country_id in self.positions
+
+    def pop_random(self, rng=random) -> int:
+        i = rng.randrange(len(self.ids))
+        country_id = self.ids[i]
+        last = self.ids.pop()
+        if last != country_id:
+            self.ids[i] = last
+            self.positions[last] = i
+        del self.positions[country_id]
+        return country_id
+
+    def sample(self, k: int, value: Callable[[int], str], exclude_ids: Set[int], exclude_values: Set[str], rng=random) -> List[int]:
+        """Draw up to k ids without removing them, skipping excluded ids and repeated values.
+
+        Rejection sampling keeps this O(k) while the pool is much larger than k; once
+        draws start colliding it falls back to one scan of the pool.
+        """
+        picked = []
+        exclude_values = set(exclude_values)
+        for _ in range(4 * k + 8):
+            if len(picked) == k or not self.ids:
+                return picked
+            country_id = self.ids[rng.randrange(len(self.ids))]
+            if country_id in exclude_ids or value(country_id) in exclude_values:
+                continue
+            picked.append(country_id)
+            exclude_values.add(value(country_id))
+        candidates = {}
+        for country_id in self.ids:
+            v = value(country_id)
+            if country_id not in exclude_ids and v not in exclude_values and v not in candidates:
+                candidates[v] = country_id
+        return picked + rng.sample(list(candidates.values()), k=min(k - len(picked), len(candidates)))
+
+def next_round(pool: RoundPool, key_field: str, distractor_key: str, num_options: int = 4, multiple_choice: bool = True, verify_distractors: bool = True, rng=random) -> Optional[Dict[str, Any]]:
+    """Remove a random answer from the pool and build its round, or return None when the pool runs dry.
+
+    With verify_distractors the answer's listed distractors are only used if they are still in
+    the pool; otherwise they are used as given. Either way the options are topped up with
+    random pool entries, so a round costs O(num_options) rather than O(len(pool)).
+    """
+    index = country_index.get_index()
+    countries = index.countries
+    answer = None
+    while pool:
+        candidate = countries[pool.pop_random(rng)]
+        if candidate[key_field] != "":
+            answer = candidate
+            break
+    if answer is None:
+        return None
+
+    if not multiple_choice:
+        return {"answer": answer, "options": [], "key_field": key_field}
+
+    value = lambda country_id: countries[country_id][key_field]
+    num_distractors = min(num_options - 1, len(pool))
+    # other entries sharing the answer's name (e.g. Georgia) never appear as options
+    same_name = set(index.by_name.get(answer["name"], ()))
+    if verify_distractors:
+        allowed = list({value(i): i for i in index.distractor_ids[(distractor_key, key_field)][answer["id"]] if i in pool}.values())
+        chosen = rng.sample(allowed, k=min(num_options - 1, len(allowed)))
+        chosen += pool.sample(num_distractors - len(chosen), value, same_name | set(chosen), {"", answer[key_field]} | {value(i) for i in chosen}, rng)
+        distractors = [value(i) for i in chosen]
+    else:
+        distractors = rng.sample(answer[distractor_key], k=min(num_options - 1, len(answer[distractor_key])))
+        if len(distractors) < num_distractors:
+            extra = pool.sample(num_distractors - len(distractors), value, same_name, {"", answer[key_field]} | set(distractors), rng)
+            distractors += [value(i) for i in extra]
+    return {"answer": answer, "options": distractors + [answer[key_field]], "key_field": key_field}
+
+def build_deck(pool_ids: Iterable[int], key_field: str, distractor_key: str, multiple_choice: bool, num_options: int, num_rounds: int, verify_distractors: bool, seed: int) -> List[Dict[str, Any]]:
+    """Generate every round of a game up front.
+
+    The same pool (in the same order), settings and seed always produce the same deck,
+    so any node can rebuild a published deck to verify or replay a game.
+    """
+    rng = random.Random(seed)
+    pool = RoundPool(pool_ids)
+    deck = []
+    while len(deck) < num_rounds:
+        round_data = next_round(pool, key_field, distractor_key, num_options, multiple_choice, verify_distractors, rng)
+        if round_data is None:
+            break
+        deck.append(round_data)
+    return deck
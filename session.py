@@ -1,18 +1,23 @@
 import streamlit as st
 import uuid
-import redis
 import os
 import time
 import json
-
-from redis.retry import Retry
-from redis.backoff import ConstantBackoff
+import threading
 
 # config
 RECENT_EVENTS_KEY = "recent_events"
 RECENT_EVENTS_LIMIT = 10
 HEARTBEAT_TIMEOUT = 60 * 60 * 2  # seconds
 EVENT_TTL = 300  # seconds
+PRESENCE_KEY = "presence"  # sorted set of uids scored by last-seen time
+REAP_INTERVAL = 60  # seconds between inactive-user sweeps per process
+REAP_BATCH = 100  # max users expired per sweep
+MULTIPLAYER_STATE_KEY = "multiplayer"  # session_state flag set by join_multiplayer
+MEMORY_BACKEND = "memory"  # ENV value that keeps all state in this process (single node, tests, benchmarks)
+
+_last_reap = 0.0
+_reap_lock = threading.Lock()
 
 def push_event(event):
     r = get_redis_connection()
@@ -20,23 +25,60 @@ def push_event(event):
     r.lpush(RECENT_EVENTS_KEY, json.dumps(event))
     r.ltrim(RECENT_EVENTS_KEY, 0, RECENT_EVENTS_LIMIT - 1)
 
-def setup_multiplayer_session():
-    r = get_redis_connection()
-    uid, username = prompt_username()
-    heartbeat()
-    show_recent_events(r, uid)
-    return r, uid, username
+def setup_session():
+    """Ask for a name if needed, without touching Redis."""
+    return prompt_username()
+
+def join_multiplayer():
+    """Mark the session as multiplayer, announcing the player the first time."""
+    if st.session_state.get(MULTIPLAYER_STATE_KEY):
+        return
+    uid, name = st.session_state.uid, st.session_state.username
+    get_redis_connection().hset(f"user:{uid}", mapping={"name": name})
+    push_event({"event": "player_joined", "uid": uid, "name": name})
+    st.session_state[MULTIPLAYER_STATE_KEY] = True
+
+def sync_presence():
+    """Send the heartbeat and show recent events, once the session has gone multiplayer."""
+    from redis.exceptions import RedisError
+
+    if "uid" not in st.session_state or not st.session_state.get(MULTIPLAYER_STATE_KEY):
+        return
+    try:
+        heartbeat()
+        show_recent_events(get_redis_connection(), st.session_state.uid)
+    except RedisError:
+        st.caption("⚠️ The multiplayer server is unreachable; single-player games still work.")
 
 @st.cache_resource
 def get_redis_connection():
-    cfg = st.secrets[os.getenv("ENV", "redis-cloud")]
-    return redis.Redis(
-        host=cfg["REDIS_HOST"],
-        port=int(cfg["REDIS_PORT"]),
-        password=cfg.get("REDIS_PASSWORD", ""),
-        decode_responses=True,
-        retry=redis.retry.Retry(ConstantBackoff(2), 3),
-    )
+    """The process-wide client, or the in-process store with ENV=memory."""
+    env = os.getenv("ENV", "redis-cloud")
+    if env == MEMORY_BACKEND:
+        import memory_store
+
+        return memory_store.MemoryRedis()
+    # imported here so single-player sessions never load the client
+    import redis_pool
+
+    return redis_pool.create_client(st.secrets[env])
+
+@st.cache_resource
+def get_long_poll_connection():
+    """The process-wide client for blocking reads, with a longer socket timeout."""
+    env = os.getenv("ENV", "redis-cloud")
+    if env == MEMORY_BACKEND:
+        return get_redis_connection()
+    import redis_pool
+
+    return redis_pool.create_client(st.secrets[env], long_poll=True)
+
+def redis_pool_stats():
+    """Usage of both connection pools, for sizing them."""
+    return {
+        "commands": get_redis_connection().connection_pool.stats(),
+        "long_poll": get_long_poll_connection().connection_pool.stats(),
+    }
 
 def prompt_username():
     if "uid" not in st.session_state:
@@ -47,10 +89,8 @@ def prompt_username():
     if "username" not in st.session_state:
         name = st.text_input("Enter your name:", key="name_input")
         if name:
+            # other players hear about this name once it joins multiplayer (see join_multiplayer)
             st.session_state.username = name
-            r = get_redis_connection()
-            r.hset(f"user:{uid}", mapping={"name": name})
-            push_event({"event": "player_joined", "uid": uid, "name": name})
             st.rerun()
         st.stop()
     
@@ -64,23 +104,33 @@ def heartbeat():
     uid = st.session_state.uid
     r = get_redis_connection()
 
-    # Update heartbeat in a shared hash
-    r.hset("last_active", uid, int(time.time()))
-
-    # Cleanup inactive users
-    for user_id, last_active in r.hgetall("last_active").items():
-        if int(time.time()) - int(last_active) > HEARTBEAT_TIMEOUT:
-            push_event({"event": "player_left", "uid": user_id, "name": r.hget(f"user:{user_id}", "name")})
-            # Cleanup games hosted by user
-            for key in r.scan_iter("game:*"):
-                if key.count(":") == 1 and r.hget(key, "host") == user_id:
-                    r.delete(key)
-                    r.delete(f"{key}:players")
-                    r.delete(f"{key}:round")
-                    r.delete(f"{key}:answers")
-                    r.delete(f"{key}:state")
-            r.delete(f"user:{user_id}")
-            r.hdel("last_active", user_id)
+    # Update heartbeat in the presence sorted set
+    now = int(time.time())
+    r.zadd(PRESENCE_KEY, {uid: now})
+    reap_inactive_users(now)
+
+def reap_inactive_users(now):
+    """Expire users not seen for HEARTBEAT_TIMEOUT, at most once per REAP_INTERVAL."""
+    global _last_reap
+    with _reap_lock:
+        if now - _last_reap < REAP_INTERVAL:
+            return
+        _last_reap = now
+
+    import multiplayer_game as mg
+
+    r = get_redis_connection()
+    expired = r.zrangebyscore(PRESENCE_KEY, "-inf", now - HEARTBEAT_TIMEOUT, start=0, num=REAP_BATCH)
+    for user_id in expired:
+        # Another process may be reaping the same user; only the one that removes it cleans up
+        if not r.zrem(PRESENCE_KEY, user_id):
+            continue
+        push_event({"event": "player_left", "uid": user_id, "name": r.hget(f"user:{user_id}", "name")})
+        # Cleanup games hosted by user
+        hosted_key = mg.HOST_GAMES.format(uid=user_id)
+        for game_id in r.smembers(hosted_key):
+            mg.delete_game(game_id)
+        r.delete(f"user:{user_id}", hosted_key)
 
 def show_recent_events(r, uid):
     if "seen_events" not in st.session_state:
@@ -638,7 +638,11 @@ def add_geography_footer():
 
 
 def show_leaderboard(leaderboard, current_uid=None):
-    """Display a live leaderboard during multiplayer games"""
+    """Display a live leaderboard during multiplayer games.
+
+    `leaderboard` is the dict returned by multiplayer_game.get_leaderboard: the top players,
+    plus the current player's row which is appended below the top list when it falls outside it.
+    """
     st.markdown("""
     <div style="
         background: rgba(255,255,255,0.95);
@@ -658,8 +662,14 @@ def show_leaderboard(leaderboard, current_uid=None):
         ">🏆 Leaderboard</div>
     """, unsafe_allow_html=True)
 
-    for idx, player in enumerate(leaderboard):
-        rank = idx + 1
+    rows = list(leaderboard["top"])
+    me = leaderboard.get("me")
+    if me and all(player["uid"] != me["uid"] for player in rows):
+        st.markdown('<div style="color: #9ca3af; text-align: center;">⋯</div>', unsafe_allow_html=True)
+        rows.append(me)
+
+    for player in rows:
+        rank = player["rank"]
         medal = ""
         if rank == 1:
             medal = "🥇 "